@@ -1,9 +1,10 @@
 import asyncio, sounddevice as sd, numpy as np, logging
 from core.config import Cfg
+from core2.ring import FrameRing
 log = logging.getLogger("audio")
 
 class AudioCapture:
-    def __init__(self, cfg: Cfg, frame_q: asyncio.Queue):
+    def __init__(self, cfg: Cfg, frame_q: FrameRing):
         self.cfg = cfg; self.frame_q = frame_q
         self.blocksize = int(cfg.sample_rate * (cfg.frame_ms/1000.0))
         self.stream = None
@@ -11,17 +12,15 @@ class AudioCapture:
     async def start(self):
         if self.cfg.simulation_mode:
             log.info("audio: simulation mode - generating silence")
+            self.frame_q.configure(self.blocksize, self.cfg.sample_rate)
             asyncio.create_task(self._sim_audio())
             return
             
-        loop = asyncio.get_running_loop()
         def cb(indata, frames, time, status):
             if status:
                 log.warning(f"audio status: {status}")
-            try:
-                asyncio.run_coroutine_threadsafe(self.frame_q.put(indata.copy()), loop)
-            except Exception as e:
-                log.error(f"audio cb error: {e}")
+            # preallocated ring: the callback only copies
+            self.frame_q.write(indata)
         # Try to find USB audio device
         devices = sd.query_devices()
         usb_device = None
@@ -49,6 +48,7 @@ class AudioCapture:
             self.blocksize = int(sample_rate * (self.cfg.frame_ms/1000.0))
             log.info(f"audio: adjusted blocksize to {self.blocksize} for {sample_rate}Hz")
         
+        self.frame_q.configure(self.blocksize, sample_rate)
         self.stream = sd.InputStream(device=usb_device, samplerate=sample_rate, channels=1, dtype='int16',
                                      blocksize=self.blocksize, callback=cb)
         self.stream.start()
@@ -58,7 +58,7 @@ class AudioCapture:
         # Generate silence in simulation mode
         while True:
             silence = np.zeros(self.blocksize, dtype='int16')
-            await self.frame_q.put(silence)
+            self.frame_q.write(silence)
             await asyncio.sleep(self.cfg.frame_ms/1000.0)
 
     async def stop(self):
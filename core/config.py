@@ -23,6 +23,8 @@ class Cfg(BaseModel):
     # audio / vad
     sample_rate: int = env("SAMPLE_RATE", 16000, int)
     frame_ms: int = env("FRAME_MS", 20, int)
+    audio_ring_frames: int = env("AUDIO_RING_FRAMES", 100, int)
+    audio_wake_frames: int = env("AUDIO_WAKE_FRAMES", 4, int)
     vad_min_speech_ms: int = env("VAD_MIN_SPEECH_MS", 250, int)
     vad_max_silence_ms: int = env("VAD_MAX_SILENCE_MS", 400, int)
     vad_aggr: int = env("VAD_AGGRESSIVENESS", 2, int)
@@ -41,6 +43,10 @@ class Cfg(BaseModel):
     llm_remote_enabled: bool = env("LLM_REMOTE_ENABLED", False, bool)
     llm_remote_base: str = env("LLM_REMOTE_BASE_URL", "")
     llm_remote_timeout_ms: int = env("LLM_REMOTE_TIMEOUT_MS", 8000, int)
+    llm_remote_model: str = env("LLM_REMOTE_MODEL", "gpt-remote")
+    llm_hedge: str = env("LLM_HEDGE", "first")  # first | remote
+    llm_hedge_delay_ms: int = env("LLM_HEDGE_DELAY_MS", -1, int)  # -1 = first endpoint's p50
+    llm_remote_deadline_ms: int = env("LLM_REMOTE_DEADLINE_MS", 2500, int)
 
     # display
     display_enabled: bool = env("DISPLAY_ENABLED", True, bool)
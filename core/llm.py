@@ -1,5 +1,6 @@
-import asyncio, httpx
 from core.config import Cfg
+from core2.hedge import Hedger
+from core2.http_pool import shared_pool
 
 SYSTEMS = {
  "memory_summarize": "Summarize the note into one short sentence, first-person neutral, no fluff.",
@@ -10,14 +11,22 @@ SYSTEMS = {
 class LLM:
     def __init__(self, cfg: Cfg):
         self.cfg = cfg
+        self.hedger = None
+        if cfg.llm_remote_enabled and cfg.llm_remote_base:
+            prefer_remote = cfg.llm_hedge == "remote"
+            self.hedger = Hedger(["remote","local"] if prefer_remote else ["local","remote"],
+                                 prefer="remote" if prefer_remote else None,
+                                 deadline_sec=cfg.llm_remote_deadline_ms/1000.0,
+                                 delay_ms=None if cfg.llm_hedge_delay_ms < 0 else cfg.llm_hedge_delay_ms)
 
     async def _chat(self, base, model, messages, timeout_ms):
-        async with httpx.AsyncClient(timeout=timeout_ms/1000.0) as cx:
-            r = await cx.post(f"{base}/chat/completions", json={
-                "model": model, "messages": messages, "temperature": 0.2, "stream": False
-            })
-            r.raise_for_status()
-            return r.json()["choices"][0]["message"]["content"].strip()
+        # pooled keep-alive client per endpoint, shared with core2
+        cx = shared_pool().client(base)
+        r = await cx.post(f"{base}/chat/completions", json={
+            "model": model, "messages": messages, "temperature": 0.2, "stream": False
+        }, timeout=timeout_ms/1000.0)
+        r.raise_for_status()
+        return r.json()["choices"][0]["message"]["content"].strip()
 
     async def summarize_memory(self, text:str)->str:
         return await self._chat(self.cfg.llm_local_base, self.cfg.llm_local_model,
@@ -32,23 +41,14 @@ class LLM:
             self.cfg.llm_timeout_ms)
 
     async def qa_dual(self, question:str):
-        local = asyncio.create_task(self._chat(
-            self.cfg.llm_local_base, self.cfg.llm_local_model,
-            [{"role":"system","content":SYSTEMS["qa"]},{"role":"user","content":question}],
-            self.cfg.llm_timeout_ms))
-        better = None
-        if self.cfg.llm_remote_enabled and self.cfg.llm_remote_base:
-            try:
-                better = asyncio.create_task(self._chat(
-                    self.cfg.llm_remote_base, "gpt-remote",
-                    [{"role":"system","content":SYSTEMS["qa"]},{"role":"user","content":question}],
-                    self.cfg.llm_remote_timeout_ms))
-            except Exception:
-                better = None
-        local_ans = await local
-        if better:
-            try:
-                return local_ans, await better
-            except Exception:
-                return local_ans, None
-        return local_ans, None
\ No newline at end of file
+        # hedged: first acceptable answer (or remote until its deadline), loser cancelled;
+        # returns (local, remote) with only the winner's slot filled
+        messages = [{"role":"system","content":SYSTEMS["qa"]},{"role":"user","content":question}]
+        calls = {"local": lambda: self._chat(self.cfg.llm_local_base, self.cfg.llm_local_model,
+                                             messages, self.cfg.llm_timeout_ms)}
+        if self.hedger is None:
+            return await calls["local"](), None
+        calls["remote"] = lambda: self._chat(self.cfg.llm_remote_base, self.cfg.llm_remote_model,
+                                             messages, self.cfg.llm_remote_timeout_ms)
+        answer, winner = await self.hedger.run(calls)
+        return (None, answer) if winner == "remote" else (answer, None)
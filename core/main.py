@@ -3,12 +3,14 @@ from dotenv import load_dotenv
 from core.config import Cfg
 from core.logging_setup import setup_logger
 from core.audio import AudioCapture
+from core2.ring import FrameRing
 from core.vad import VADGate
 from core.asr import ASRWorker
 from core.intent import IntentRouter
 from core.events import EventProcessor
 from location.gps_tachyon import TachyonGPS
 from core.display import Display
+from core2.http_pool import shared_pool
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import threading, json, time
 
@@ -32,7 +34,7 @@ async def main():
     log = logging.getLogger("main")
     log.info("boot: earshot starting")
 
-    frame_q = asyncio.Queue(maxsize=8)
+    frame_q = FrameRing(cfg.audio_ring_frames, cfg.audio_wake_frames)
     voiced_q = asyncio.Queue(maxsize=4)
     asr_q = asyncio.Queue(maxsize=16)
     event_q = asyncio.Queue(maxsize=8)
@@ -60,6 +62,7 @@ async def main():
         )
     finally:
         log.info("boot: shutting down, clearing display")
+        await shared_pool().close()
         await display.clear_and_sleep()
 
 if __name__ == "__main__":
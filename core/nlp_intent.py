@@ -1,6 +1,7 @@
 import os, numpy as np, logging, onnxruntime as ort
 from typing import List, Dict, Tuple, Optional
-from transformers import AutoTokenizer
+from core2.embedding_cache import EmbeddingCache
+from core2.tokenizer import FastTokenizer
 log = logging.getLogger("intent")
 
 _DEFAULT_PROTOS = {
@@ -25,25 +26,18 @@ _DEFAULT_PROTOS = {
 def _cos(a,b): return float(np.dot(a,b) / (np.linalg.norm(a)*np.linalg.norm(b) + 1e-9))
 
 class MiniLMEmbedder:
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, cache: Optional[EmbeddingCache] = None):
         self.sess = ort.InferenceSession(os.path.join(model_dir, "model.onnx"),
                                          providers=["CPUExecutionProvider"])
-        self.tok = AutoTokenizer.from_pretrained(model_dir)  # uses local tokenizer files
+        self.tok = FastTokenizer(model_dir)  # tokenizer.json, without importing transformers
+        self.cache = cache if cache is not None else EmbeddingCache()
 
     def encode(self, texts: List[str]) -> np.ndarray:
-        inputs = self.tok(texts, padding=True, truncation=True, max_length=256, return_tensors="np")
-        # Check what inputs the model expects
-        model_inputs = {
-            "input_ids": inputs["input_ids"],
-            "attention_mask": inputs["attention_mask"]
-        }
-        # Add token_type_ids if expected by the model
-        if "token_type_ids" in inputs:
-            model_inputs["token_type_ids"] = inputs["token_type_ids"]
-        else:
-            # Create token_type_ids filled with zeros if not provided
-            model_inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
-        
+        # repeated utterances ("okay", "thank you") skip the model via the LRU cache
+        return self.cache.encode(texts, self._encode)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        model_inputs = self.tok(texts)  # input_ids, attention_mask, token_type_ids
         out = self.sess.run(None, model_inputs)[0]
         # L2-normalize rows for stable cosine later (optional)
         return out.astype(np.float32)
@@ -72,7 +72,7 @@ class VADGate:
                 elif self.sr == 44100:
                     resampled_frame = frame[::3].astype(np.int16)  # 44k->~15k approximation  
                 else:
-                    resampled_frame = frame
+                    resampled_frame = frame.copy()  # ring frames are views
                     
                 speech_buf.append(resampled_frame)
                 in_speech = True; last_speech_ts = now
@@ -85,7 +85,7 @@ class VADGate:
                         elif self.sr == 44100:
                             resampled_frame = frame[::3].astype(np.int16)
                         else:
-                            resampled_frame = frame
+                            resampled_frame = frame.copy()
                         speech_buf.append(resampled_frame)
                     else:
                         in_speech = False
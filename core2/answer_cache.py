@@ -0,0 +1,187 @@
+"""Persistent semantic cache of LLM answers to repeated questions."""
+import asyncio
+import collections
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+log = logging.getLogger("answers")
+
+
+class AnswerCache:
+    """Answers keyed on the question's MiniLM embedding.
+
+    A lookup returns the stored answer of the most similar question when its
+    cosine similarity reaches `threshold` and it is younger than `ttl_sec`.
+    Entries are evicted least-recently-used and appended to a JSONL file (off
+    the event loop) so repeats survive restarts; the file is rewritten with
+    just the live entries once it grows to twice `max_entries` lines.
+    Questions matching one already being answered wait for that request
+    instead of sending their own, and take it over if its owner is cancelled.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.92, ttl_sec: float = 21600,
+                 max_entries: int = 256):
+        self.path = os.path.expanduser(path)
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()  # id -> (vector, question, answer, created)
+        self.inflight: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._next_id = 0
+        self._lines = 0  # rows in the file, including evicted ones
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="answers")
+
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        rows = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue  # a torn last line after a crash
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            log.warning(f"answers: ignoring unreadable cache {self.path}: {e}")
+            return
+        self._lines = len(rows)
+        now = time.time()
+        for row in rows[-self.max_entries:]:
+            if now - row["created"] < self.ttl_sec:
+                self._add(np.asarray(row["vector"], dtype=np.float32), row["question"],
+                          row["answer"], row["created"])
+        log.info(f"answers: {len(self.entries)} cached answer(s) loaded")
+
+    @staticmethod
+    def _row(vector: np.ndarray, question: str, answer: str, created: float) -> str:
+        return json.dumps({"question": question, "answer": answer, "created": created,
+                           "vector": [round(float(x), 5) for x in vector]}, ensure_ascii=False) + "\n"
+
+    def _append(self, line: str):
+        """Append one row (runs on the writer thread)."""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            log.warning(f"answers: cannot save cache: {e}")
+
+    def _rewrite(self, lines: List[str]):
+        """Replace the file with only the live rows (runs on the writer thread)."""
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning(f"answers: cannot compact cache: {e}")
+
+    def _add(self, vector: np.ndarray, question: str, answer: str, created: float):
+        self._next_id += 1
+        self.entries[self._next_id] = (vector, question, answer, created)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def lookup(self, vector: np.ndarray) -> Optional[str]:
+        """Cached answer for a near-identical question, or None; counts a hit or miss."""
+        answer = self._find(vector)
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def _find(self, vector: np.ndarray) -> Optional[str]:
+        now = time.time()
+        for key in [k for k, e in self.entries.items() if now - e[3] >= self.ttl_sec]:
+            del self.entries[key]
+        if not self.entries:
+            return None
+
+        keys = list(self.entries)
+        matrix = np.stack([self.entries[k][0] for k in keys])
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        self.entries.move_to_end(keys[best])
+        _, question, answer, _ = self.entries[keys[best]]
+        log.info(f"answers: hit ({similarities[best]:.3f}) for '{question}'")
+        return answer
+
+    def put(self, vector: np.ndarray, question: str, answer: str):
+        created = time.time()
+        self._add(vector, question, answer, created)
+        self._lines += 1
+        loop = asyncio.get_running_loop()
+        if self._lines >= 2 * self.max_entries:
+            lines = [self._row(*e) for e in self.entries.values()]
+            self._lines = len(lines)
+            loop.run_in_executor(self.writer, self._rewrite, lines)
+        else:
+            loop.run_in_executor(self.writer, self._append, self._row(vector, question, answer, created))
+
+    async def answer(self, vector: np.ndarray, question: str,
+                     compute: Callable[[], Awaitable[str]]) -> str:
+        """A share of an identical in-flight request, or a new one that is then stored.
+
+        Callers check `lookup` first; this only re-checks the cache (without
+        counting) for an answer stored while they waited.
+        """
+        while True:
+            cached = self._find(vector)
+            if cached is not None:
+                return cached
+            shared = next((f for other, f in self.inflight
+                           if float(other @ vector) >= self.threshold), None)
+            if shared is None:
+                break
+            self.joined += 1
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise  # this caller was cancelled
+                # The owner was cancelled: look again, taking the request over if needed
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (vector, future)
+        self.inflight.append(entry)
+        try:
+            answer = await compute()
+            future.set_result(answer)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here so a lone failure is not reported twice
+            raise
+        finally:
+            self.inflight.remove(entry)
+
+        # Don't pin non-answers
+        if answer and not answer.lower().startswith("not sure"):
+            self.put(vector, question, answer)
+        return answer
+
+    def stats(self) -> dict:
+        return {
+            "answers_cached": len(self.entries),
+            "answer_hits": self.hits,
+            "answer_joined": self.joined,
+            "answer_misses": self.misses
+        }
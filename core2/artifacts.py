@@ -0,0 +1,109 @@
+"""On-disk cache of derived model artifacts, for fast startup."""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import onnxruntime as ort
+
+log = logging.getLogger("artifacts")
+
+
+class ArtifactCache:
+    """Stores ORT-optimized models and precomputed arrays under a cache dir.
+
+    Entries are keyed by content hashes of their inputs, so editing a model,
+    tokenizer or prototype list simply produces a new key. File hashes are
+    remembered by (path, size, mtime) so large models are not re-read on
+    every start.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.expanduser(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._digests_path = os.path.join(self.root, "digests.json")
+        try:
+            with open(self._digests_path, encoding="utf-8") as f:
+                self._digests = json.load(f)
+        except (OSError, ValueError):
+            self._digests = {}
+
+    def file_digest(self, path: str) -> str:
+        """sha256 of a file, memoized on its size and mtime."""
+        st = os.stat(path)
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        entry = self._digests.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self._digests[path] = [stamp, digest]
+        self._write_json(self._digests_path, self._digests)
+        return digest
+
+    def key(self, files: Iterable[str] = (), extra: str = "") -> str:
+        """Combined key over existing files and any extra text."""
+        h = hashlib.sha256()
+        for path in files:
+            if os.path.isfile(path):
+                h.update(self.file_digest(path).encode())
+        h.update(extra.encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def session(self, model_path: str, providers=("CPUExecutionProvider",)) -> ort.InferenceSession:
+        """Open a session, reusing a previously saved ORT-optimized graph."""
+        key = self.key([model_path], ort.__version__)
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        opt_path = os.path.join(self.root, f"{name}.{key}.opt.onnx")
+        opts = ort.SessionOptions()
+
+        if os.path.isfile(opt_path):
+            # Already optimized offline; skip the graph passes
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            start = time.monotonic()
+            session = ort.InferenceSession(opt_path, opts, providers=list(providers))
+            log.info(f"artifacts: loaded optimized {name} in {time.monotonic() - start:.2f}s")
+            return session
+
+        tmp_path = opt_path + ".tmp"
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        opts.optimized_model_filepath = tmp_path
+        session = ort.InferenceSession(model_path, opts, providers=list(providers))
+        try:
+            os.replace(tmp_path, opt_path)
+            log.info(f"artifacts: saved optimized {name} to {opt_path}")
+        except OSError as e:
+            log.warning(f"artifacts: could not save optimized model: {e}")
+        return session
+
+    def load_array(self, key: str, name: str) -> Optional[np.ndarray]:
+        """Memory-map a cached array, or None if absent."""
+        path = os.path.join(self.root, f"{name}.{key}.npy")
+        if not os.path.isfile(path):
+            return None
+        try:
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            log.warning(f"artifacts: ignoring unreadable {path}: {e}")
+            return None
+
+    def save_array(self, key: str, name: str, array: np.ndarray):
+        path = os.path.join(self.root, f"{name}.{key}.npy")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_json(path: str, data: dict):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
@@ -1,18 +1,23 @@
 """Automatic Speech Recognition using Vosk."""
 import asyncio
+import collections
 import json
 import logging
 import os
 import pathlib
 import shutil
 import tempfile
+import time
 import urllib.request
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 import numpy as np
 import vosk
 
 from core2.config import Config
+from core2.vad import SPEECH_END
 
 log = logging.getLogger("asr")
 
@@ -27,9 +32,8 @@ def download_vosk_model(cache_dir: str, model_name: str) -> str:
     
     os.makedirs(cache_dir, exist_ok=True)
     
-    # Download the small English model
-    url = "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip"
-    log.info(f"asr: downloading Vosk model (first run only)...")
+    url = f"https://alphacephei.com/vosk/models/{model_name}.zip"
+    log.info(f"asr: downloading Vosk model {model_name} (first run only)...")
     
     tmpd = tempfile.mkdtemp()
     try:
@@ -48,8 +52,38 @@ def download_vosk_model(cache_dir: str, model_name: str) -> str:
     return target
 
 
+class AudioStore:
+    """Bounded in-RAM store of recent 16 kHz segments, keyed by segment id."""
+    
+    def __init__(self, max_sec: float, sample_rate: int = 16000):
+        self.max_samples = int(max_sec * sample_rate)
+        self.segments = collections.OrderedDict()
+        self.samples = 0
+    
+    def add(self, segment_id: int, audio: np.ndarray):
+        if self.max_samples <= 0:
+            return
+        self.segments[segment_id] = audio
+        self.samples += len(audio)
+        while self.samples > self.max_samples and self.segments:
+            _, old = self.segments.popitem(last=False)
+            self.samples -= len(old)
+    
+    def get(self, segment_id: int) -> Optional[np.ndarray]:
+        return self.segments.get(segment_id)
+
+
 class ASRWorker:
-    """Transcribes speech audio using Vosk."""
+    """Transcribes speech audio using Vosk.
+    
+    Decoding runs on a thread pool with one `KaldiRecognizer` per worker, all
+    sharing a single `vosk.Model`, so the event loop never blocks in Kaldi.
+    Results are re-emitted in the order the segments arrived.
+    
+    Each transcript is put on the text queue as {"id", "text", "ts"}. The audio
+    of recent segments is kept in RAM so `refine(id)` can re-decode an
+    actionable utterance with a larger model in the background.
+    """
     
     def __init__(self, cfg: Config, speech_queue: asyncio.Queue, text_queue: asyncio.Queue):
         self.cfg = cfg
@@ -60,23 +94,280 @@ class ASRWorker:
         model_dir = download_vosk_model(cfg.vosk_model_cache, cfg.vosk_model_name)
         self.model = vosk.Model(model_dir)
         log.info(f"asr: loaded Vosk model from {model_dir}")
+        
+        self.workers = max(1, cfg.asr_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asr")
+        self.recognizers = None  # idle recognizers, created in run()
+        self.ordered = None      # decode futures in arrival order
+        
+        # Latest partial hypothesis in streaming mode
+        self.partial = ""
+        
+        # Second pass: recent audio plus an optional larger model
+        self.audio = AudioStore(cfg.asr_keep_audio_sec)
+        self.next_id = 0
+        self.refine_model = None
+        self.refine_executor = None
+        if cfg.vosk_refine_model_name:
+            self.refine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-refine")
+        
+        # Optional keyword-spotting front end (segment mode only)
+        self.kws_mode = cfg.asr_kws_mode
+        self.kws_recognizer = None
+        self.held = collections.deque()  # (id, ts, audio) skipped by the keyword gate
+        self.last_trigger = float("-inf")
+        self.kws_stats = {}
+        if self.kws_mode in ("drop", "defer"):
+            if cfg.asr_streaming:
+                log.warning("asr: keyword spotting needs whole segments, ignored in streaming mode")
+            else:
+                phrases = [p.strip().lower() for p in cfg.asr_kws_phrases.split(",") if p.strip()]
+                self.kws_recognizer = vosk.KaldiRecognizer(self.model, 16000, json.dumps(phrases + ["[unk]"]))
+                self.kws_stats = {"kws_hits": 0, "kws_skipped": 0, "kws_dropped": 0, "kws_deferred": 0}
+                log.info(f"asr: keyword gate ({self.kws_mode}) on {len(phrases)} phrases")
+        
+        self.segments = 0
+        self.busy_sec = 0.0
+        self.started = time.monotonic()
     
-    async def run(self):
-        """Main ASR processing loop."""
+    def _new_recognizer(self):
         # Vosk expects 16kHz audio (VAD already resamples to this)
         recognizer = vosk.KaldiRecognizer(self.model, 16000)
         recognizer.SetWords(False)
+        return recognizer
+    
+    @staticmethod
+    def _decode(recognizer, audio: np.ndarray) -> Tuple[dict, float]:
+        """Decode a whole segment (runs in an executor thread)."""
+        start = time.monotonic()
+        recognizer.AcceptWaveform(audio.tobytes())
+        result = json.loads(recognizer.FinalResult())
+        return result, time.monotonic() - start
+    
+    @staticmethod
+    def _feed(recognizer, audio: np.ndarray) -> Tuple[Optional[dict], str, float]:
+        """Feed a streamed chunk (runs in an executor thread)."""
+        start = time.monotonic()
+        if recognizer.AcceptWaveform(audio.tobytes()):
+            # Vosk found an endpoint inside the utterance
+            result, partial = json.loads(recognizer.Result()), ""
+        else:
+            result = None
+            partial = json.loads(recognizer.PartialResult()).get("partial", "")
+        return result, partial, time.monotonic() - start
+    
+    @staticmethod
+    def _finish(recognizer) -> Tuple[dict, float]:
+        """Flush a streamed utterance (runs in an executor thread)."""
+        start = time.monotonic()
+        result = json.loads(recognizer.FinalResult())
+        return result, time.monotonic() - start
+    
+    def _submit(self, func, recognizer, *args) -> asyncio.Future:
+        """Run func on the pool and return the recognizer to the idle set after."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, func, recognizer, *args)
+        future.add_done_callback(lambda _: self.recognizers.put_nowait(recognizer))
+        return future
+    
+    def _store(self, audio: np.ndarray) -> int:
+        """Keep a segment's audio for a possible second pass; returns its id."""
+        self.next_id += 1
+        self.audio.add(self.next_id, audio)
+        return self.next_id
+    
+    async def _emit(self, segment_id: int, result: dict, ts: float):
+        """Forward recognized text (stamped with when the speech ended) to the intent stage."""
+        text = (result.get("text") or "").strip()
+        if text:
+            await self.text_queue.put({"id": segment_id, "text": text, "ts": ts})
+            log.info(f"asr: '{text}'")
+    
+    async def _emit_in_order(self):
+        """Await decode futures in arrival order and forward their text."""
+        while True:
+            segment_id, ts, future = await self.ordered.get()
+            try:
+                result, busy = await future
+            except Exception as e:
+                log.error(f"asr: decode failed: {e}")
+                continue
+            self.segments += 1
+            self.busy_sec += busy
+            await self._emit(segment_id, result, ts)
+    
+    def _load_refine_model(self):
+        """Load the second-pass model (runs in the refine thread)."""
+        model_dir = download_vosk_model(self.cfg.vosk_model_cache, self.cfg.vosk_refine_model_name)
+        self.refine_model = vosk.Model(model_dir)
+        log.info(f"asr: loaded refine model from {model_dir}")
+    
+    def _redecode(self, audio: np.ndarray) -> str:
+        """Decode a stored segment with the larger model (runs in the refine thread)."""
+        if self.refine_model is None:
+            self._load_refine_model()
+        recognizer = vosk.KaldiRecognizer(self.refine_model, 16000)
+        recognizer.SetWords(False)
+        recognizer.AcceptWaveform(audio.tobytes())
+        return (json.loads(recognizer.FinalResult()).get("text") or "").strip()
+    
+    def refine(self, segment_id: int) -> Optional[asyncio.Future]:
+        """Re-decode a segment with the refine model; None if unavailable."""
+        if self.refine_executor is None:
+            return None
+        audio = self.audio.get(segment_id)
+        if audio is None:
+            return None
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.refine_executor, self._redecode, audio)
+    
+    @staticmethod
+    def _spot(recognizer, audio: np.ndarray) -> str:
+        """Run the grammar-restricted recognizer (runs in an executor thread)."""
+        recognizer.AcceptWaveform(audio.tobytes())
+        text = json.loads(recognizer.FinalResult()).get("text") or ""
+        return text.replace("[unk]", "").strip()
+    
+    async def _wanted(self, segment_id: int, ts: float, audio: np.ndarray) -> bool:
+        """Keyword gate: True if the segment should be fully decoded now.
+        
+        Segments that hit a trigger phrase, or fall within the context window
+        after one, are decoded; held segments within the pre-window of a new
+        trigger are released for decoding first, in order.
+        """
+        loop = asyncio.get_running_loop()
+        hit = await loop.run_in_executor(self.executor, self._spot, self.kws_recognizer, audio)
         
-        log.info("asr: started")
+        if hit:
+            self.kws_stats["kws_hits"] += 1
+            log.debug(f"asr: trigger '{hit}'")
+            self.last_trigger = ts
+            pre_start = ts - self.cfg.context_pre_sec
+            for held_id, held_ts, held_audio in self._release_held(pre_start):
+                recognizer = await self.recognizers.get()
+                await self.ordered.put((held_id, held_ts, self._submit(self._decode, recognizer, held_audio)))
+            return True
+        
+        if ts - self.last_trigger <= self.cfg.context_post_sec:
+            return True
+        
+        self.held.append((segment_id, ts, audio))
+        self.kws_stats["kws_skipped"] += 1
+        # Drop mode only keeps what a future trigger's pre-window could use
+        keep_after = ts - self.cfg.context_pre_sec if self.kws_mode == "drop" else float("-inf")
+        while self.held and (self.held[0][1] < keep_after or len(self.held) > self.cfg.asr_kws_max_held):
+            self.held.popleft()
+            self.kws_stats["kws_dropped"] += 1
+        return False
+    
+    def _release_held(self, since: float) -> List[Tuple[int, float, np.ndarray]]:
+        """Remove and return held segments newer than `since`."""
+        released = [item for item in self.held if item[1] >= since]
+        if released:
+            self.held = collections.deque(item for item in self.held if item[1] < since)
+        return released
+    
+    async def _decode_deferred(self):
+        """Low-priority decoding of held segments while the pool is idle.
+        
+        Results go through the ordered queue like any other decode, keeping
+        their original timestamps so the rolling buffer files them in place.
+        """
+        while True:
+            await asyncio.sleep(0.5)
+            while (self.held and self.speech_queue.empty()
+                   and self.recognizers.qsize() == self.workers):
+                segment_id, ts, audio = self.held.popleft()
+                recognizer = await self.recognizers.get()
+                self.kws_stats["kws_deferred"] += 1
+                await self.ordered.put((segment_id, ts, self._submit(self._decode, recognizer, audio)))
+    
+    def stats(self) -> dict:
+        wall = max(1e-6, time.monotonic() - self.started)
+        return {
+            "workers": self.workers,
+            "segments": self.segments,
+            "busy_sec": round(self.busy_sec, 1),
+            "utilization": round(self.busy_sec / (wall * self.workers), 3),
+            **self.kws_stats
+        }
+    
+    async def run(self):
+        """Main ASR processing loop."""
+        self.recognizers = asyncio.Queue()
+        self.ordered = asyncio.Queue()
+        for _ in range(self.workers):
+            self.recognizers.put_nowait(self._new_recognizer())
+        emitter = asyncio.create_task(self._emit_in_order())
+        deferred = None
+        if self.kws_recognizer is not None and self.kws_mode == "defer":
+            deferred = asyncio.create_task(self._decode_deferred())
+        if self.refine_executor:
+            # Load the large model in the background so the first refine is fast
+            asyncio.get_running_loop().run_in_executor(self.refine_executor, self._load_refine_model)
+        
+        try:
+            if self.cfg.asr_streaming:
+                await self._run_streaming()
+            else:
+                await self._run_segments()
+        finally:
+            emitter.cancel()
+            if deferred:
+                deferred.cancel()
+            self.executor.shutdown(wait=False)
+            if self.refine_executor:
+                self.refine_executor.shutdown(wait=False)
+    
+    async def _run_segments(self):
+        """Distribute whole segments across the recognizer pool."""
+        log.info(f"asr: started ({self.workers} worker(s))")
+        kws = self.kws_recognizer is not None
         
         while True:
             audio = await self.speech_queue.get()
+            ts = time.time()
+            segment_id = self._store(audio)
+            
+            if kws and not await self._wanted(segment_id, ts, audio):
+                continue
+            
+            # Waits here when every recognizer is busy
+            recognizer = await self.recognizers.get()
+            await self.ordered.put((segment_id, ts, self._submit(self._decode, recognizer, audio)))
+    
+    async def _run_streaming(self):
+        """Feed voiced chunks to one recognizer per utterance as the VAD sends them."""
+        log.info(f"asr: started (streaming, {self.workers} worker(s))")
+        loop = asyncio.get_running_loop()
+        recognizer = None
+        chunks = []  # audio of the current utterance, for the second pass
+        
+        while True:
+            item = await self.speech_queue.get()
+            if recognizer is None:
+                recognizer = await self.recognizers.get()
             
-            # Process audio through recognizer
-            recognizer.AcceptWaveform(audio.tobytes())
-            result = json.loads(recognizer.FinalResult())
+            if isinstance(item, str) and item == SPEECH_END:
+                # Finalize off-loop; the next utterance can start on another recognizer
+                segment_id = self._store(np.concatenate(chunks) if chunks else np.zeros(0, np.int16))
+                await self.ordered.put((segment_id, time.time(), self._submit(self._finish, recognizer)))
+                recognizer = None
+                chunks = []
+                self.partial = ""
+                continue
             
-            text = (result.get("text") or "").strip()
-            if text:
-                await self.text_queue.put(text)
-                log.info(f"asr: '{text}'")
+            chunks.append(item)
+            result, partial, busy = await loop.run_in_executor(
+                self.executor, self._feed, recognizer, item
+            )
+            self.busy_sec += busy
+            if result is not None:
+                segment_id = self._store(np.concatenate(chunks))
+                chunks = []
+                done = loop.create_future()
+                done.set_result((result, 0.0))
+                await self.ordered.put((segment_id, time.time(), done))
+            if partial != self.partial:
+                self.partial = partial
+                log.debug(f"asr: partial '{partial}'")
@@ -5,24 +5,42 @@ import numpy as np
 import sounddevice as sd
 
 from core2.config import Config
+from core2.replay import FileSource
+from core2.ring import FrameRing
 
 log = logging.getLogger("audio")
 
 
 class AudioCapture:
-    """Captures audio frames from USB microphone and pushes to queue."""
+    """Captures audio frames from USB microphone into the frame ring."""
     
-    def __init__(self, cfg: Config, frame_queue: asyncio.Queue):
+    def __init__(self, cfg: Config, frame_queue: FrameRing):
         self.cfg = cfg
         self.frame_queue = frame_queue
         self.blocksize = int(cfg.sample_rate * (cfg.frame_ms / 1000.0))
         self.stream = None
+        self.source = None
+        self.replay_task = None
         self.actual_sample_rate = cfg.sample_rate
     
     async def start(self):
-        """Start audio capture (simulation mode or real USB device)."""
+        """Start audio capture (file replay, simulation mode or real USB device)."""
+        if self.cfg.audio_source:
+            self.source = FileSource(
+                self.cfg.audio_source,
+                self.cfg.sample_rate,
+                self.cfg.frame_ms,
+                speed=self.cfg.replay_speed,
+                loop=self.cfg.replay_loop
+            )
+            self.frame_queue.configure(self.blocksize, self.actual_sample_rate)
+            self.replay_task = asyncio.create_task(self.source.run(self.frame_queue))
+            self.replay_task.add_done_callback(self._replay_done)
+            return
+        
         if self.cfg.simulation_mode:
             log.info("audio: simulation mode - generating silence")
+            self.frame_queue.configure(self.blocksize, self.actual_sample_rate)
             asyncio.create_task(self._simulate_audio())
             return
         
@@ -53,18 +71,13 @@ class AudioCapture:
         if self.actual_sample_rate != self.cfg.sample_rate:
             self.blocksize = int(self.actual_sample_rate * (self.cfg.frame_ms / 1000.0))
         
-        # Setup callback to push frames to queue
-        loop = asyncio.get_running_loop()
+        # Preallocate the ring; the callback only copies into it
+        self.frame_queue.configure(self.blocksize, self.actual_sample_rate)
         
         def callback(indata, frames, time, status):
             if status:
                 log.warning(f"audio: {status}")
-            try:
-                asyncio.run_coroutine_threadsafe(
-                    self.frame_queue.put(indata.copy()), loop
-                )
-            except Exception as e:
-                log.error(f"audio: callback error: {e}")
+            self.frame_queue.write(indata)
         
         # Start the audio stream
         self.stream = sd.InputStream(
@@ -82,11 +95,17 @@ class AudioCapture:
         """Generate silence frames in simulation mode."""
         while True:
             silence = np.zeros(self.blocksize, dtype='int16')
-            await self.frame_queue.put(silence)
+            self.frame_queue.write(silence)
             await asyncio.sleep(self.cfg.frame_ms / 1000.0)
     
+    def _replay_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"audio: replay failed: {task.exception()}", exc_info=task.exception())
+    
     async def stop(self):
         """Stop audio capture."""
+        if self.replay_task:
+            self.replay_task.cancel()
         if self.stream:
             self.stream.stop()
             self.stream.close()
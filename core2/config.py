@@ -27,28 +27,106 @@ class Config(BaseModel):
     # Audio settings
     sample_rate: int = env("SAMPLE_RATE", 16000, int)
     frame_ms: int = env("FRAME_MS", 20, int)
+    audio_ring_frames: int = env("AUDIO_RING_FRAMES", 100, int)
+    audio_wake_frames: int = env("AUDIO_WAKE_FRAMES", 4, int)
+    
+    # Replay recorded audio instead of the microphone (file or directory of WAV/FLAC)
+    audio_source: str = env("AUDIO_SOURCE", "")
+    replay_speed: float = env("REPLAY_SPEED", 1.0, float)  # 0 = as fast as consumers accept
+    replay_loop: bool = env("REPLAY_LOOP", False, bool)
     
     # VAD (Voice Activity Detection) settings
     vad_min_speech_ms: int = env("VAD_MIN_SPEECH_MS", 250, int)
     vad_max_silence_ms: int = env("VAD_MAX_SILENCE_MS", 400, int)
+    vad_max_segment_ms: int = env("VAD_MAX_SEGMENT_MS", 15000, int)  # 0 = unbounded
+    vad_mode: str = env("VAD_MODE", "silero")  # silero | staged | energy
+    vad_gate_margin_db: float = env("VAD_GATE_MARGIN_DB", 9.0, float)
+    vad_gate_hangover_ms: int = env("VAD_GATE_HANGOVER_MS", 300, int)
     silero_model_path: str = env("SILERO_MODEL_PATH", str(_MODELS_DIR / "silero_vad.onnx"))
     
     # ASR (Automatic Speech Recognition) settings
     vosk_model_cache: str = env("VOSK_MODEL_CACHE", str(_HOME_DIR / ".cache" / "vosk"))
     vosk_model_name: str = env("VOSK_MODEL", "vosk-model-small-en-us-0.15")
+    asr_streaming: bool = env("ASR_STREAMING", False, bool)  # feed Vosk while speech is ongoing
+    asr_stream_chunk_ms: int = env("ASR_STREAM_CHUNK_MS", 100, int)
+    asr_workers: int = env("ASR_WORKERS", 1, int)  # recognizers decoding in parallel
+    
+    # Two-pass ASR: re-decode actionable utterances with a larger model
+    vosk_refine_model_name: str = env("VOSK_REFINE_MODEL", "")  # e.g. vosk-model-en-us-0.22
+    asr_keep_audio_sec: int = env("ASR_KEEP_AUDIO_SEC", 60, int)  # recent audio kept in RAM
+    asr_refine_timeout_sec: float = env("ASR_REFINE_TIMEOUT_SEC", 8.0, float)
+    
+    # Keyword-spotting front end: off | drop | defer (decode skipped segments when idle)
+    asr_kws_mode: str = env("ASR_KWS_MODE", "off")
+    asr_kws_phrases: str = env(
+        "ASR_KWS_PHRASES",
+        "remind me,remember that,remember to,don't forget,add a todo,to do,"
+        "note that,what is,what's,who is,how do,when is,where is"
+    )
+    asr_kws_max_held: int = env("ASR_KWS_MAX_HELD", 50, int)
     
     # Rolling buffer (for context window)
     context_pre_sec: int = env("CONTEXT_PRE_SEC", 10, int)
     context_post_sec: int = env("CONTEXT_POST_SEC", 15, int)
+    context_silence_sec: float = env("CONTEXT_SILENCE_SEC", 4.0, float)  # close early after quiet; 0 = off
+    context_provisional: bool = env("CONTEXT_PROVISIONAL", False, bool)  # show the trigger at once, no LLM
+    context_tokens_memory: int = env("CONTEXT_TOKENS_MEMORY", 192, int)  # 0 = whole window
+    context_tokens_todo: int = env("CONTEXT_TOKENS_TODO", 128, int)
+    context_tokens_question: int = env("CONTEXT_TOKENS_QUESTION", 96, int)
+    context_max_entries: int = env("CONTEXT_MAX_ENTRIES", 2000, int)
+    context_max_kb: int = env("CONTEXT_MAX_KB", 256, int)
     
     # Intent classification
     intent_model_path: str = env("INTENT_MODEL_PATH", str(_MODELS_DIR / "all-MiniLM-L6-v2"))
+    intent_model_variant: str = env("INTENT_MODEL_VARIANT", "fp32")  # fp32 | int8
     intent_threshold: float = env("INTENT_THRESHOLD", 0.28, float)
+    intent_cache_size: int = env("INTENT_CACHE_SIZE", 512, int)  # cached utterance embeddings
+    intent_prototypes_path: str = env("INTENT_PROTOTYPES_PATH", str(_HOME_DIR / "intent_prototypes.json"))
+    intent_prototypes_poll_sec: int = env("INTENT_PROTOTYPES_POLL_SEC", 5, int)  # 0 = no reload
+    intent_scoring: str = env("INTENT_SCORING", "mean")  # mean | nearest (best single example)
+    intent_rules: bool = env("INTENT_RULES", True, bool)  # keyword rules before the model
+    intent_rules_path: str = env("INTENT_RULES_PATH", "")  # JSON/YAML rules; "" = built-in
+    intent_max_tokens: int = env("INTENT_MAX_TOKENS", 64, int)  # tokenizer truncation length
+    intent_batch_max: int = env("INTENT_BATCH_MAX", 16, int)  # utterances per model call
+    intent_batch_wait_ms: int = env("INTENT_BATCH_WAIT_MS", 5, int)  # linger for more before running
+    model_cache_dir: str = env("MODEL_CACHE_DIR", str(_HOME_DIR / ".cache" / "models"))  # "" = off
     
     # LLM settings (OpenAI-compatible endpoint)
     llm_base_url: str = env("LLM_BASE_URL", "http://localhost:11434/v1")
     llm_model: str = env("LLM_MODEL", "gemma2:2b")
     llm_timeout_sec: int = env("LLM_TIMEOUT_SEC", 10, int)
+    llm_stream: bool = env("LLM_STREAM", True, bool)  # SSE; answers shown from the first sentence
+    
+    # Optional remote endpoint that questions are hedged against
+    llm_remote_base_url: str = env("LLM_REMOTE_BASE_URL", "")  # "" = local only
+    llm_remote_model: str = env("LLM_REMOTE_MODEL", "gpt-remote")
+    llm_remote_timeout_sec: int = env("LLM_REMOTE_TIMEOUT_SEC", 8, int)
+    llm_hedge: str = env("LLM_HEDGE", "first")  # first (fastest acceptable) | remote (prefer remote)
+    llm_hedge_delay_ms: int = env("LLM_HEDGE_DELAY_MS", -1, int)  # -1 = first endpoint's p50
+    llm_remote_deadline_ms: int = env("LLM_REMOTE_DEADLINE_MS", 2500, int)  # how long "remote" waits
+    
+    # LLM request scheduling: question > todo > memory
+    llm_concurrency: int = env("LLM_CONCURRENCY", 2, int)  # requests in flight at once
+    llm_deadline_question_sec: float = env("LLM_DEADLINE_QUESTION_SEC", 30.0, float)  # 0 = none
+    llm_deadline_todo_sec: float = env("LLM_DEADLINE_TODO_SEC", 0.0, float)
+    llm_deadline_memory_sec: float = env("LLM_DEADLINE_MEMORY_SEC", 0.0, float)
+    llm_backlog_depth: int = env("LLM_BACKLOG_DEPTH", 4, int)  # queued events that count as a backlog
+    llm_backlog_memory: str = env("LLM_BACKLOG_MEMORY", "cheap")  # cheap | defer
+    llm_max_queued: int = env("LLM_MAX_QUEUED", 32, int)  # then shed lower priority or push back
+    llm_max_deferred: int = env("LLM_MAX_DEFERRED", 32, int)  # deferred memories kept (oldest dropped)
+    llm_defer_max_sec: float = env("LLM_DEFER_MAX_SEC", 300.0, float)  # deferred memories expire after
+    
+    # Shared HTTP connection pools (LLM endpoint, TickTick)
+    http_max_connections: int = env("HTTP_MAX_CONNECTIONS", 8, int)  # per endpoint
+    http_max_keepalive: int = env("HTTP_MAX_KEEPALIVE", 4, int)
+    http_keepalive_sec: float = env("HTTP_KEEPALIVE_SEC", 120.0, float)
+    http2: bool = env("HTTP2", False, bool)  # needs the 'h2' package
+    
+    # Semantic cache of answers to repeated questions
+    answer_cache: bool = env("ANSWER_CACHE", True, bool)
+    answer_cache_threshold: float = env("ANSWER_CACHE_THRESHOLD", 0.92, float)  # cosine similarity
+    answer_cache_ttl_sec: int = env("ANSWER_CACHE_TTL_SEC", 21600, int)
+    answer_cache_size: int = env("ANSWER_CACHE_SIZE", 256, int)
     
     # Display settings
     display_enabled: bool = env("DISPLAY_ENABLED", True, bool)
@@ -60,3 +138,4 @@ class Config(BaseModel):
     
     # Logging
     log_level: str = env("LOG_LEVEL", "INFO")
+    stats_log_sec: int = env("STATS_LOG_SEC", 60, int)
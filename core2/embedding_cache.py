@@ -0,0 +1,78 @@
+"""Bounded LRU cache of sentence embeddings keyed on normalized text."""
+import collections
+import re
+import threading
+from typing import Callable, List, Optional
+
+import numpy as np
+
+_SPACES = re.compile(r"\s+")
+_EDGE_PUNCT = re.compile(r"^[\s.,!?;:'\"-]+|[\s.,!?;:'\"-]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, trim edge punctuation and collapse whitespace."""
+    return _SPACES.sub(" ", _EDGE_PUNCT.sub("", text.lower()))
+
+
+class EmbeddingCache:
+    """LRU map from normalized text to its embedding vector.
+
+    Common short utterances ("okay", "yeah", "thank you") repeat constantly;
+    caching them skips tokenization and a model run. Safe to share between
+    the event loop and worker threads.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = normalize_text(text)
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, text: str, vec: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        key = normalize_text(text)
+        with self._lock:
+            self._entries[key] = vec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def encode(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embed texts, running `encode` once on just the distinct cache misses."""
+        vectors = [self.get(t) for t in texts]
+        # Group misses by key so repeats within one batch are encoded once
+        missing = {}
+        for i, vec in enumerate(vectors):
+            if vec is None:
+                missing.setdefault(normalize_text(texts[i]), []).append(i)
+        if missing:
+            groups = list(missing.values())
+            fresh = encode([texts[group[0]] for group in groups])
+            for group, vec in zip(groups, fresh):
+                for i in group:
+                    vectors[i] = vec
+                self.put(texts[group[0]], vec)
+        return np.stack(vectors)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "cache_size": len(self._entries),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
@@ -5,11 +5,15 @@ import logging
 import time
 from pathlib import Path
 
+from core2.answer_cache import AnswerCache
 from core2.config import Config
 from core2.llm import LLMClient
+from core2.llm_scheduler import LLMScheduler
 
 log = logging.getLogger("events")
 
+PROVISIONAL_TITLES = {"memory": "Memory", "todo": "To-Do", "question": "Question"}
+
 
 class EventProcessor:
     """Processes intent events using LLM and displays results."""
@@ -20,6 +24,28 @@ class EventProcessor:
         self.gps = gps
         self.display = display
         self.llm = LLMClient(cfg)
+        self.scheduler = LLMScheduler(
+            self._handle,
+            cfg.llm_concurrency,
+            {"question": cfg.llm_deadline_question_sec, "todo": cfg.llm_deadline_todo_sec,
+             "memory": cfg.llm_deadline_memory_sec},
+            cfg.llm_backlog_depth,
+            cfg.llm_backlog_memory,
+            cfg.llm_max_queued,
+            cfg.llm_max_deferred,
+            cfg.llm_defer_max_sec
+        )
+        # Events waiting for their refine pass before they are queued for the LLM
+        self.preparing = asyncio.Semaphore(max(1, cfg.llm_max_queued))
+        self.tasks = set()
+        self.answers = None
+        if cfg.answer_cache:
+            self.answers = AnswerCache(
+                str(Path(cfg.data_dir).expanduser() / "answer_cache.jsonl"),
+                cfg.answer_cache_threshold,
+                cfg.answer_cache_ttl_sec,
+                cfg.answer_cache_size
+            )
         
         # Create storage directory for events
         self.data_dir = Path(cfg.data_dir).expanduser() / "events"
@@ -31,63 +57,159 @@ class EventProcessor:
         with filepath.open("a", encoding="utf-8") as f:
             f.write(json.dumps(data, ensure_ascii=False) + "\n")
     
+    async def _refined_context(self, event: dict) -> str:
+        """Swap in the second-pass transcript of the trigger, if it arrives in time."""
+        context = event["context"]
+        refined = event.get("refined")
+        if refined is None:
+            return context
+        
+        try:
+            text = await asyncio.wait_for(asyncio.shield(refined), self.cfg.asr_refine_timeout_sec)
+        except asyncio.TimeoutError:
+            log.debug("events: refine timed out, using first-pass text")
+            return context
+        except Exception as e:
+            log.warning(f"events: refine failed: {e}")
+            return context
+        
+        if text and text != event["text"]:
+            log.info(f"events: refined '{event['text']}' -> '{text}'")
+            context = context.replace(event["text"], text)
+            event["text"] = text
+        return context
+    
     async def run(self):
-        """Main event processing loop."""
+        """Hand events to the LLM scheduler as they arrive; it runs them by priority."""
         log.info("events: started")
-        
+        await asyncio.gather(self.scheduler.run(), self._intake())
+    
+    async def _intake(self):
         while True:
             event = await self.event_queue.get()
+            if event.get("provisional", False):
+                # Provisional events (pre-context only) show the trigger without an LLM
+                # call; the complete event follows once the context window closes
+                task = asyncio.create_task(
+                    self.display.show_message(PROVISIONAL_TITLES[event["type"]], event["text"] + " …"))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                continue
             
-            event_type = event["type"]
-            context = event["context"]
-            timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(event["timestamp"]))
-            location = self.gps.current()
+            # Bounded: once the scheduler is full too, the router waits on event_queue
+            await self.preparing.acquire()
+            task = asyncio.create_task(self._prepare(event))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+    
+    async def _prepare(self, event: dict):
+        """Answer cache hits directly; otherwise wait for the refine pass outside the LLM slots and queue."""
+        try:
+            # A repeated question is answered from the cache without waiting for the refine pass
+            vector = event.get("embedding") if self.answers else None
+            cached = self.answers.lookup(vector) if vector is not None else None
+            if cached is not None:
+                # Nothing left for the LLM: show it here instead of taking a scheduler slot
+                log.info(f"events: question (cached) -> '{cached}'")
+                await self.display.show_message("Answer", cached)
+                self._save_event("questions.jsonl", {
+                    "type": "question",
+                    "question": event["context"],
+                    "answer": cached,
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(event["timestamp"])),
+                    "location": self.gps.current()
+                })
+                return
             
-            try:
-                if event_type == "memory":
-                    # Summarize memory note
+            event["context"] = await self._refined_context(event)
+            await self.scheduler.submit(event)
+        except Exception as e:
+            log.error(f"events: cannot queue {event['type']}: {e}", exc_info=True)
+        finally:
+            self.preparing.release()
+    
+    async def _handle(self, event: dict, cheap: bool = False):
+        """Process one event; `cheap` trades summary quality for speed under backlog."""
+        event_type = event["type"]
+        context = event["context"]
+        vector = event.get("embedding") if self.answers else None
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(event["timestamp"]))
+        location = self.gps.current()
+        
+        try:
+            if event_type == "memory":
+                # Summarize memory note; under backlog only the trigger line, briefly
+                if cheap:
+                    summary = await self.llm.summarize_memory_brief(event["text"])
+                else:
                     summary = await self.llm.summarize_memory(context)
-                    log.info(f"events: memory -> '{summary}'")
-                    
-                    await self.display.show_message("Memory", summary)
-                    
-                    self._save_event("memory.jsonl", {
-                        "type": "memory",
-                        "summary": summary,
-                        "timestamp": timestamp,
-                        "location": location
-                    })
+                log.info(f"events: memory{' (brief)' if cheap else ''} -> '{summary}'")
                 
-                elif event_type == "todo":
-                    # Extract to-do item
-                    todo = await self.llm.summarize_todo(context)
-                    log.info(f"events: todo -> '{todo}'")
-                    
-                    await self.display.show_message("To-Do", todo)
-                    
-                    self._save_event("todos.jsonl", {
-                        "type": "todo",
-                        "task": todo,
-                        "timestamp": timestamp,
-                        "location": location
-                    })
-                    
-                    # Future: integrate with TickTick here
+                await self.display.show_message("Memory", summary)
                 
-                elif event_type == "question":
-                    # Answer question
-                    answer = await self.llm.answer_question(context)
-                    log.info(f"events: question -> '{answer}'")
-                    
-                    await self.display.show_message("Answer", answer)
-                    
-                    self._save_event("questions.jsonl", {
-                        "type": "question",
-                        "question": context,
-                        "answer": answer,
-                        "timestamp": timestamp,
-                        "location": location
-                    })
+                self._save_event("memory.jsonl", {
+                    "type": "memory",
+                    "summary": summary,
+                    "timestamp": timestamp,
+                    "location": location
+                })
             
-            except Exception as e:
-                log.error(f"events: error processing {event_type}: {e}", exc_info=True)
+            elif event_type == "todo":
+                # Extract to-do item
+                todo = await self.llm.summarize_todo(context)
+                log.info(f"events: todo -> '{todo}'")
+                
+                await self.display.show_message("To-Do", todo)
+                
+                self._save_event("todos.jsonl", {
+                    "type": "todo",
+                    "task": todo,
+                    "timestamp": timestamp,
+                    "location": location
+                })
+                
+                # Future: integrate with TickTick here
+            
+            elif event_type == "question":
+                # Answer question, showing the first sentence while the rest streams in
+                early = []
+                shown = []  # the early display task, awaited before the final text
+                
+                def show_early(sentence: str):
+                    early.append(sentence)
+                    shown.append(asyncio.create_task(self.display.show_message("Answer", sentence + " …")))
+                
+                def ask():
+                    return self.llm.answer_question(context, show_early)
+                
+                try:
+                    if vector is not None:
+                        # Stored for next time; a matching question already in flight is shared
+                        answer = await self.answers.answer(vector, event["text"], ask)
+                    else:
+                        answer = await ask()
+                except BaseException:
+                    for task in shown:
+                        task.cancel()
+                    raise
+                log.info(f"events: question -> '{answer}'")
+                
+                # Let the early sentence land first, then refresh with the full answer
+                for task in shown:
+                    try:
+                        await task
+                    except Exception as e:
+                        log.warning(f"events: early display failed: {e}")
+                if not early or answer != early[0]:
+                    await self.display.show_message("Answer", answer)
+                
+                self._save_event("questions.jsonl", {
+                    "type": "question",
+                    "question": context,
+                    "answer": answer,
+                    "timestamp": timestamp,
+                    "location": location
+                })
+        
+        except Exception as e:
+            log.error(f"events: error processing {event_type}: {e}", exc_info=True)
@@ -0,0 +1,187 @@
+"""Hedged requests across LLM endpoints, driven by per-endpoint latency histograms."""
+import asyncio
+import collections
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+log = logging.getLogger("hedge")
+
+
+def is_acceptable(answer: str) -> bool:
+    """An answer worth showing: non-empty and not a shrug."""
+    return bool(answer) and not answer.lower().startswith("not sure")
+
+
+class LatencyHistogram:
+    """Log-spaced latency buckets (about 10% wide) for one endpoint.
+
+    Requests cancelled before they finished are recorded as censored samples:
+    all that is known is that they would have taken longer. Quantiles use the
+    Kaplan-Meier estimate over the buckets, so losers of a hedge keep pulling
+    the estimate up instead of vanishing from it. Counts are halved once
+    `max_count` samples accumulate so the quantiles follow an endpoint whose
+    latency drifts (a model swap, a busy GPU).
+    """
+
+    def __init__(self, min_ms: float = 10.0, max_ms: float = 60000.0, growth: float = 1.1,
+                 max_count: int = 1000):
+        steps = int(np.ceil(np.log(max_ms / min_ms) / np.log(growth))) + 1
+        self.bounds = min_ms * growth ** np.arange(steps)
+        self.counts = np.zeros(steps + 1, dtype=np.float64)    # finished requests
+        self.censored = np.zeros(steps + 1, dtype=np.float64)  # cancelled after this long
+        self.max_count = max_count
+
+    def __len__(self) -> int:
+        return int(round(self.counts.sum() + self.censored.sum()))
+
+    def record(self, ms: float, censored: bool = False):
+        (self.censored if censored else self.counts)[np.searchsorted(self.bounds, ms)] += 1
+        if self.counts.sum() + self.censored.sum() >= self.max_count:
+            self.counts *= 0.5
+            self.censored *= 0.5
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile `q` (ms), or None if empty.
+
+        If too many samples are censored for the estimate to reach `q`, the
+        largest recorded latency is returned (a lower bound on the quantile).
+        """
+        samples = self.counts + self.censored
+        total = samples.sum()
+        if total == 0:
+            return None
+        # Samples at or beyond each bucket; a bucket's censored ones count as at risk in it
+        at_risk = total - np.concatenate(([0.0], np.cumsum(samples)[:-1]))
+        hazard = np.divide(self.counts, at_risk, out=np.zeros_like(at_risk), where=at_risk > 0)
+        survival = np.cumprod(1.0 - hazard)
+        reached = np.flatnonzero(survival <= 1.0 - q + 1e-9)
+        i = reached[0] if len(reached) else np.flatnonzero(samples)[-1]
+        return float(self.bounds[min(i, len(self.bounds) - 1)])
+
+
+class Hedger:
+    """Races one request across endpoints, keeping the first acceptable answer.
+
+    Endpoints are launched in `order`. Each later one starts after the hedge
+    delay (or at once if the ones before it failed or shrugged). The delay is
+    `delay_ms` or, when that is None, the running `quantile` of the first
+    endpoint's latency, so the second request is only sent once the first is
+    slower than usual. With `prefer` set, an acceptable answer from another
+    endpoint is held until `deadline_sec` in case the preferred one answers
+    too. Requests still outstanding when a winner is chosen are cancelled.
+    """
+
+    def __init__(self, order: Sequence[str], prefer: Optional[str] = None, deadline_sec: float = 0.0,
+                 delay_ms: Optional[float] = None, quantile: float = 0.5, min_samples: int = 10):
+        self.order = list(order)
+        self.prefer = prefer
+        self.deadline_sec = deadline_sec
+        self.delay_ms = delay_ms
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.histograms = {name: LatencyHistogram() for name in self.order}
+
+        self.requests = 0
+        self.hedged = 0
+        self.cancelled = 0
+        self.wins = collections.Counter()
+
+    def delay_sec(self) -> float:
+        """Wait before launching the next endpoint."""
+        if self.delay_ms is not None:
+            return self.delay_ms / 1000.0
+        histogram = self.histograms[self.order[0]]
+        if len(histogram) < self.min_samples:
+            return 0.0  # no latency picture yet: race from the start
+        return histogram.quantile(self.quantile) / 1000.0
+
+    async def _timed(self, name: str, call: Callable[[], Awaitable[str]]) -> str:
+        start = time.monotonic()
+        try:
+            answer = await call()
+        except asyncio.CancelledError:
+            # Lost the race: it would have taken at least this long
+            self.histograms[name].record((time.monotonic() - start) * 1000.0, censored=True)
+            raise
+        self.histograms[name].record((time.monotonic() - start) * 1000.0)
+        return answer
+
+    async def run(self, calls: Dict[str, Callable[[], Awaitable[str]]],
+                  acceptable: Callable[[str], bool] = is_acceptable) -> Tuple[str, str]:
+        """Return (answer, endpoint name) of the winning request."""
+        self.requests += 1
+        waiting = [name for name in self.order if name in calls]
+        pending: Dict[asyncio.Task, str] = {}
+        fallback: Optional[Tuple[str, str]] = None  # acceptable, but not from `prefer`
+        shrug: Optional[Tuple[str, str]] = None     # an unacceptable answer, if nothing better
+        error: Optional[Exception] = None
+        delay = self.delay_sec()
+        start = time.monotonic()
+
+        def launch():
+            name = waiting.pop(0)
+            if pending:
+                self.hedged += 1
+            pending[asyncio.create_task(self._timed(name, calls[name]))] = name
+
+        try:
+            launch()
+            while pending or waiting:
+                elapsed = time.monotonic() - start
+                preferred_open = self.prefer in waiting or self.prefer in pending.values()
+                if fallback and (elapsed >= self.deadline_sec or not preferred_open):
+                    break
+                if waiting and (not pending or elapsed >= delay):
+                    launch()
+                    continue
+
+                timeouts = []
+                if waiting:
+                    timeouts.append(delay - elapsed)
+                if fallback:
+                    timeouts.append(self.deadline_sec - elapsed)
+                done, _ = await asyncio.wait(pending, timeout=min(timeouts) if timeouts else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        answer = task.result()
+                    except Exception as e:
+                        log.warning(f"hedge: {name} failed: {e}")
+                        error = e
+                        continue
+                    if not acceptable(answer):
+                        shrug = shrug or (answer, name)
+                    elif self.prefer is None or name == self.prefer:
+                        self.wins[name] += 1
+                        return answer, name
+                    else:
+                        fallback = fallback or (answer, name)
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+                    self.cancelled += 1
+
+        result = fallback or shrug
+        if result is None:
+            raise error or RuntimeError("hedge: no endpoint answered")
+        self.wins[result[1]] += 1
+        return result
+
+    def stats(self) -> dict:
+        stats = {
+            "hedge_requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_cancelled": self.cancelled,
+            "hedge_delay_ms": round(self.delay_sec() * 1000.0)
+        }
+        for name, histogram in self.histograms.items():
+            stats[f"{name}_wins"] = self.wins[name]
+            if len(histogram):
+                stats[f"{name}_p50_ms"] = round(histogram.quantile(0.5))
+                stats[f"{name}_p90_ms"] = round(histogram.quantile(0.9))
+        return stats
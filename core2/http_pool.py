@@ -0,0 +1,95 @@
+"""Shared keep-alive HTTP clients, one connection pool per endpoint."""
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # optional: only needed for HTTP/2
+    h2 = None
+
+log = logging.getLogger("http")
+
+
+class HttpPool:
+    """Long-lived `httpx.AsyncClient`s keyed by origin (scheme://host:port).
+
+    Requests to the same endpoint reuse warm connections instead of paying a
+    TCP and TLS handshake each time. New connections are counted through
+    httpcore's trace extension, so `stats()` shows how often one was reused.
+    """
+
+    def __init__(self, max_connections: int = 8, max_keepalive: int = 4,
+                 keepalive_sec: float = 120.0, http2: bool = False):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_sec
+        )
+        if http2 and h2 is None:
+            log.warning("http: HTTP/2 needs the 'h2' package, using HTTP/1.1")
+        self.http2 = http2 and h2 is not None
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+
+        self.requests = 0
+        self.connections = 0
+        self.handshakes = 0
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Pooled client for the endpoint serving `base_url`."""
+        parts = urlsplit(base_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self.clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                event_hooks={"request": [self._on_request]}
+            )
+            self.clients[origin] = client
+            log.info(f"http: pool for {origin} (http2={self.http2})")
+        return client
+
+    async def _on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            self.connections += 1
+        elif event == "connection.start_tls.complete":
+            self.handshakes += 1
+
+    async def close(self):
+        """Close every pooled connection; called once on shutdown."""
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": len(self.clients),
+            "requests": self.requests,
+            "connections": self.connections,
+            "tls_handshakes": self.handshakes,
+            "reused": max(0, self.requests - self.connections)
+        }
+
+
+_shared: Optional[HttpPool] = None
+
+
+def shared_pool() -> HttpPool:
+    """Process-wide pool; `configure` replaces the defaults at startup."""
+    global _shared
+    if _shared is None:
+        _shared = HttpPool()
+    return _shared
+
+
+def configure(pool: HttpPool) -> HttpPool:
+    global _shared
+    _shared = pool
+    return pool
@@ -1,21 +1,28 @@
-"""Intent classification and rolling context buffer."""
+"""Intent classification and routing of transcribed text into events."""
 import asyncio
-import collections
+import json
 import logging
 import os
 import time
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import onnxruntime as ort
-from transformers import AutoTokenizer
 
+from core2.artifacts import ArtifactCache
 from core2.config import Config
+from core2.embedding_cache import EmbeddingCache
+from core2.prototypes import PrototypeFile, PrototypeSet, build_prototype_set
+from core2.rolling import RollingBuffer
+from core2.rules import DEFAULT_RULES, RuleSet
+from core2.scheduler import EmissionScheduler
+from core2.tokenizer import FastTokenizer
 
 log = logging.getLogger("intent")
 
 
-# Default prototype sentences for intent classification
+# Default prototype sentences, used to seed the editable prototypes file
 INTENT_PROTOTYPES = {
     "memory": [
         "This is a personal note to remember later.",
@@ -35,143 +42,322 @@ INTENT_PROTOTYPES = {
     ]
 }
 
+# ONNX file for each INTENT_MODEL_VARIANT; int8 comes from tools/quantize_intent.py
+MODEL_VARIANTS = {"fp32": "model.onnx", "int8": "model.int8.onnx"}
 
-class RollingBuffer:
-    """Maintains a rolling time window of transcribed text for context."""
-    
-    def __init__(self, pre_sec: int, post_sec: int):
-        self.pre_sec = pre_sec
-        self.post_sec = post_sec
-        self.buffer = collections.deque()  # (timestamp, text)
-    
-    def add(self, text: str):
-        """Add text with current timestamp to buffer."""
-        now = time.time()
-        self.buffer.append((now, text))
-        
-        # Clean up old entries (keep some extra buffer)
-        cutoff = now - (self.pre_sec + self.post_sec + 60)
-        while self.buffer and self.buffer[0][0] < cutoff:
-            self.buffer.popleft()
-    
-    def get_window(self, center_ts: float) -> str:
-        """Get text within time window around center timestamp."""
-        start = center_ts - self.pre_sec
-        end = center_ts + self.post_sec
-        return " ".join(t for ts, t in self.buffer if start <= ts <= end)
+# Files whose contents change how text is tokenized
+TOKENIZER_FILES = ("tokenizer.json", "tokenizer_config.json", "vocab.txt", "special_tokens_map.json")
 
 
 class IntentClassifier:
     """Classifies text intent using sentence embeddings."""
     
-    def __init__(self, model_dir: str, threshold: float):
+    def __init__(self, model_dir: str, threshold: float, cache_size: int = 512,
+                 artifact_dir: str = "", max_tokens: int = 64, variant: str = "fp32",
+                 rules: Optional[RuleSet] = None, prototypes: Optional[Dict[str, List[str]]] = None,
+                 scoring: str = "mean"):
         self.threshold = threshold
+        self.cache = EmbeddingCache(cache_size)
+        self.rules = rules  # decides obvious cases before the model
+        self.scoring = scoring  # mean vector per label, or nearest single example
+        self.model_sec = 0.0
+        self.model_texts = 0
+        self.artifacts = ArtifactCache(artifact_dir) if artifact_dir else None
         
-        # Load ONNX model and tokenizer
-        model_path = os.path.join(model_dir, "model.onnx")
-        self.session = ort.InferenceSession(
-            model_path,
-            providers=["CPUExecutionProvider"]
-        )
-        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        # Load ONNX model (optimized graph reused across starts) and tokenizer
+        model_path = os.path.join(model_dir, MODEL_VARIANTS.get(variant, "model.onnx"))
+        if not os.path.isfile(model_path):
+            log.warning(f"intent: no {variant} model at {model_path}, using fp32")
+            model_path = os.path.join(model_dir, MODEL_VARIANTS["fp32"])
+        if self.artifacts:
+            self.session = self.artifacts.session(model_path)
+        else:
+            self.session = ort.InferenceSession(
+                model_path,
+                providers=["CPUExecutionProvider"]
+            )
+        self.tokenizer = FastTokenizer(model_dir, max_tokens)
+        self._artifact_files = [model_path] + [os.path.join(model_dir, name) for name in TOKENIZER_FILES]
         
-        # Compute prototype embeddings
-        self.prototypes = INTENT_PROTOTYPES
-        self.prototype_vectors = {}
-        for label, examples in self.prototypes.items():
-            embeddings = self._encode(examples)
-            self.prototype_vectors[label] = embeddings.mean(axis=0)
+        # Prototype embeddings, replaced as one snapshot when the prototypes change
+        self.protos: Optional[PrototypeSet] = None
+        self.set_prototypes(prototypes or INTENT_PROTOTYPES)
         
-        log.info("intent: classifier initialized")
+        log.info(f"intent: classifier initialized ({os.path.basename(model_path)})")
     
-    def _encode(self, texts: List[str]) -> np.ndarray:
-        """Encode texts to embeddings."""
-        inputs = self.tokenizer(
-            texts,
-            padding=True,
-            truncation=True,
-            max_length=256,
-            return_tensors="np"
-        )
+    def set_prototypes(self, prototypes: Dict[str, List[str]]) -> int:
+        """Embed any new example sentences and swap in the new prototypes.
         
-        # Build model inputs
-        model_inputs = {
-            "input_ids": inputs["input_ids"],
-            "attention_mask": inputs["attention_mask"]
-        }
+        Unchanged examples reuse their vectors from the current snapshot (or the
+        artifact cache at startup). Returns the number of sentences encoded.
+        """
+        texts = [text for label in prototypes for text in prototypes[label]]
+        key = None
+        if self.artifacts:
+            extra = json.dumps([texts, self.tokenizer.max_length])
+            key = self.artifacts.key(self._artifact_files, extra)
+            raw = self.artifacts.load_array(key, "prototypes")
+            if raw is not None and raw.shape[0] == len(texts):
+                log.info("intent: prototype embeddings loaded from cache")
+                self.protos = build_prototype_set(prototypes, raw)
+                return 0
         
-        # Add token_type_ids if needed
-        if "token_type_ids" in inputs:
-            model_inputs["token_type_ids"] = inputs["token_type_ids"]
-        else:
-            model_inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+        known = dict(zip(self.protos.texts, self.protos.raw)) if self.protos else {}
+        fresh = [text for text in dict.fromkeys(texts) if text not in known]
+        if fresh:
+            known.update(zip(fresh, self._encode_bucketed(fresh)))
+        raw = np.stack([known[text] for text in texts]).astype(np.float32)
+        
+        if self.artifacts:
+            self.artifacts.save_array(key, "prototypes", raw)
+        # Single attribute assignment: classify_batch sees the old or the new set, never a mix
+        self.protos = build_prototype_set(prototypes, raw)
+        return len(fresh)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts to embeddings."""
+        model_inputs = self.tokenizer(texts)
         
         # Run model
         output = self.session.run(None, model_inputs)[0]
         return output.astype(np.float32)
     
     @staticmethod
-    def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-        """Compute cosine similarity between vectors."""
-        return float(
-            np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-9)
-        )
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows so cosine similarity is a dot product."""
+        return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-9)
     
-    def classify(self, text: str) -> Tuple[str, float, Dict[str, float]]:
-        """Classify text intent. Returns (label, score, all_scores)."""
-        embedding = self._encode([text])[0]
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Normalized embeddings, served from the LRU cache where possible."""
+        return self.cache.encode(texts, lambda misses: self._normalize(self._encode_bucketed(misses)))
+    
+    def _encode_bucketed(self, texts: List[str], bucket_size: int = 8) -> np.ndarray:
+        """Raw embeddings, encoding similar-length texts together to limit padding."""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = [None] * len(texts)
+        for start in range(0, len(order), bucket_size):
+            bucket = order[start:start + bucket_size]
+            vectors = self._encode([texts[i] for i in bucket])
+            for i, vec in zip(bucket, vectors):
+                out[i] = vec
+        return np.stack(out)
+    
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float, Dict[str, float]]]:
+        """Classify several texts; rule hits skip the model, the rest share one call per bucket."""
+        results = [None] * len(texts)
+        if self.rules:
+            for i, text in enumerate(texts):
+                hit = self.rules.match(text)
+                if hit:
+                    results[i] = (hit.label, hit.confidence, {hit.label: hit.confidence})
         
-        # Compute similarities to all prototypes
-        scores = {
-            label: self._cosine_similarity(embedding, proto)
-            for label, proto in self.prototype_vectors.items()
-        }
+        pending = [i for i, r in enumerate(results) if r is None]
+        if not pending:
+            return results
         
-        # Get best match
-        label, score = max(scores.items(), key=lambda x: x[1])
+        start = time.monotonic()
+        embeddings = self.embed([texts[i] for i in pending])
+        protos = self.protos
         
-        # Apply threshold
-        if score < self.threshold:
-            label = "ignore"
+        # Cosine similarity to every prototype in one matrix product
+        if self.scoring == "nearest":
+            # Best single example per label; examples are stored grouped by label
+            similarities = np.maximum.reduceat(embeddings @ protos.examples.T, protos.starts, axis=1)
+        else:
+            similarities = embeddings @ protos.means.T
+        for i, row in zip(pending, similarities):
+            best = int(np.argmax(row))
+            label, score = protos.labels[best], float(row[best])
+            
+            # Apply threshold
+            if score < self.threshold:
+                label = "ignore"
+            
+            results[i] = (label, score, dict(zip(protos.labels, row.tolist())))
         
-        return label, float(score), {k: float(v) for k, v in scores.items()}
+        self.model_sec += time.monotonic() - start
+        self.model_texts += len(pending)
+        return results
+    
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        if self.rules:
+            stats.update(self.rules.stats())
+            # Estimate model time avoided from the average cost of texts that did run
+            per_text = self.model_sec / self.model_texts if self.model_texts else 0.0
+            stats["rule_saved_ms"] = round(sum(self.rules.hits.values()) * per_text * 1000.0)
+        return stats
+    
+    def classify(self, text: str) -> Tuple[str, float, Dict[str, float]]:
+        """Classify text intent. Returns (label, score, all_scores)."""
+        return self.classify_batch([text])[0]
 
 
 class IntentRouter:
     """Routes transcribed text through intent classification and generates events."""
     
-    def __init__(self, cfg: Config, text_queue: asyncio.Queue, event_queue: asyncio.Queue):
+    def __init__(self, cfg: Config, text_queue: asyncio.Queue, event_queue: asyncio.Queue,
+                 refine: Optional[Callable[[int], Optional[asyncio.Future]]] = None):
         self.cfg = cfg
         self.text_queue = text_queue
         self.event_queue = event_queue
+        self.refine = refine  # second-pass ASR for actionable utterances
+        
+        self.buffer = RollingBuffer(
+            cfg.context_pre_sec,
+            cfg.context_post_sec,
+            cfg.context_max_entries,
+            cfg.context_max_kb * 1024
+        )
+        rules = None
+        if cfg.intent_rules:
+            rules = RuleSet.from_file(cfg.intent_rules_path) if cfg.intent_rules_path else RuleSet(DEFAULT_RULES)
+        
+        # Prototypes come from an editable file under data_dir when configured
+        self.prototype_file = None
+        prototypes = INTENT_PROTOTYPES
+        if cfg.intent_prototypes_path:
+            self.prototype_file = PrototypeFile(cfg.intent_prototypes_path, INTENT_PROTOTYPES)
+            try:
+                prototypes = self.prototype_file.load()
+            except Exception as e:
+                log.warning(f"intent: using built-in prototypes, {self.prototype_file.path}: {e}")
+        
+        self.classifier = IntentClassifier(
+            cfg.intent_model_path,
+            cfg.intent_threshold,
+            cfg.intent_cache_size,
+            cfg.model_cache_dir,
+            cfg.intent_max_tokens,
+            cfg.intent_model_variant,
+            rules,
+            prototypes,
+            cfg.intent_scoring
+        )
+        
+        # Context token budget per event type (MiniLM tokens, 0 = whole window)
+        self.context_budgets = {
+            "memory": cfg.context_tokens_memory,
+            "todo": cfg.context_tokens_todo,
+            "question": cfg.context_tokens_question
+        }
         
-        self.buffer = RollingBuffer(cfg.context_pre_sec, cfg.context_post_sec)
-        self.classifier = IntentClassifier(cfg.intent_model_path, cfg.intent_threshold)
+        # Events wait here until their post-context has been transcribed
+        self.scheduler = EmissionScheduler(cfg.context_post_sec, cfg.context_silence_sec, self._emit)
+        
+        # The model runs off the event loop; one thread keeps batches in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent")
+        self.batches = 0
+        self.batched_texts = 0
+    
+    def stats(self) -> dict:
+        stats = self.classifier.stats()
+        stats.update(self.buffer.stats())
+        stats.update(self.scheduler.stats())
+        stats["batches"] = self.batches
+        stats["batch_avg"] = round(self.batched_texts / self.batches, 2) if self.batches else 0.0
+        return stats
+    
+    async def watch_prototypes(self):
+        """Poll the prototypes file and swap in edits without pausing the pipeline."""
+        if not self.prototype_file or self.cfg.intent_prototypes_poll_sec <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        path = self.prototype_file.path
+        
+        while True:
+            await asyncio.sleep(self.cfg.intent_prototypes_poll_sec)
+            if not self.prototype_file.changed():
+                continue
+            try:
+                prototypes = self.prototype_file.load()
+                # Same executor as classification, so a swap never lands mid-batch
+                encoded = await loop.run_in_executor(
+                    self.executor, self.classifier.set_prototypes, prototypes
+                )
+                log.info(f"intent: reloaded {path}: {len(prototypes)} labels, "
+                         f"{encoded} example(s) embedded")
+            except Exception as e:
+                log.warning(f"intent: keeping previous prototypes, {path}: {e}")
+    
+    async def _next_batch(self) -> List[dict]:
+        """Wait for one utterance, then gather more for up to `intent_batch_wait_ms`."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.text_queue.get()]
+        deadline = loop.time() + self.cfg.intent_batch_wait_ms / 1000.0
+        
+        while len(batch) < self.cfg.intent_batch_max:
+            try:
+                batch.append(self.text_queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.text_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
     
     async def run(self):
         """Main intent routing loop."""
         log.info("intent: started")
+        loop = asyncio.get_running_loop()
         
         while True:
-            text = await self.text_queue.get()
+            batch = await self._next_batch()
             
-            # Add to rolling buffer
-            self.buffer.add(text)
+            # Add to rolling buffer; new speech may complete held events' windows
+            for utterance in batch:
+                self.buffer.add(utterance["text"], utterance["ts"])
+                self.scheduler.heard(utterance["ts"])
             
-            # Classify intent
-            label, score, scores = self.classifier.classify(text)
-            log.info(f"intent: '{text}' -> {label} ({score:.3f})")
+            # Classify intent for the whole batch in the worker thread
+            results = await loop.run_in_executor(
+                self.executor, self.classifier.classify_batch, [u["text"] for u in batch]
+            )
+            self.batches += 1
+            self.batched_texts += len(batch)
             
-            # Generate event if actionable
-            if label in ("memory", "todo", "question"):
-                center_ts = time.time()
-                context = self.buffer.get_window(center_ts)
-                
-                event = {
-                    "type": label,
-                    "text": text,
-                    "context": context,
-                    "timestamp": center_ts
-                }
+            # Question embeddings key the answer cache (usually already in the LRU cache)
+            questions = [u["text"] for u, r in zip(batch, results) if r[0] == "question"]
+            vectors = {}
+            if questions and self.cfg.answer_cache:
+                embedded = await loop.run_in_executor(self.executor, self.classifier.embed, questions)
+                vectors = dict(zip(questions, embedded))
+            
+            for utterance, (label, score, scores) in zip(batch, results):
+                text = utterance["text"]
+                log.info(f"intent: '{text}' -> {label} ({score:.3f})")
                 
-                await self.event_queue.put(event)
+                # Generate event if actionable; context is filled in when its window closes
+                if label in ("memory", "todo", "question"):
+                    event = {
+                        "type": label,
+                        "text": text,
+                        "context": "",
+                        "timestamp": utterance["ts"],
+                        # Re-decoded text from the larger ASR model, if configured
+                        "refined": self.refine(utterance["id"]) if self.refine else None,
+                        "embedding": vectors.get(text),
+                        "provisional": False
+                    }
+                    
+                    if self.cfg.context_provisional and self.cfg.context_post_sec > 0:
+                        # Act on the pre-context right away; the full event follows
+                        await self._emit(dict(event, provisional=True))
+                    self.scheduler.schedule(event, utterance["ts"])
+    
+    async def _emit(self, event: dict):
+        """Fill in the context window around the trigger and hand the event on."""
+        budget = self.context_budgets.get(event["type"], 0)
+        context, tokens, kept, total = self.buffer.get_budgeted_window(
+            event["timestamp"], budget, self.classifier.tokenizer.count
+        )
+        event["context"] = context
+        event["context_tokens"] = tokens
+        log.info(f"intent: {event['type']} context {tokens} tokens "
+                 f"({kept}/{total} lines, budget {budget or 'none'})")
+        await self.event_queue.put(event)
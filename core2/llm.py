@@ -1,9 +1,16 @@
 """LLM interaction for summaries and question answering."""
+import collections
+import json
 import logging
+import re
+import time
+from typing import AsyncIterator, Callable, Optional
 
-import httpx
+import numpy as np
 
 from core2.config import Config
+from core2.hedge import Hedger, is_acceptable
+from core2.http_pool import HttpPool, shared_pool
 
 log = logging.getLogger("llm")
 
@@ -11,47 +18,177 @@ log = logging.getLogger("llm")
 # System prompts for different LLM tasks
 SYSTEM_PROMPTS = {
     "memory": "Summarize the note into one short sentence, first-person neutral, no fluff.",
+    "memory_brief": "Restate as a terse note, <=10 words.",
     "todo": "Extract one actionable to-do, imperative verb, <=12 words.",
     "question": "Answer VERY concisely (<=180 chars). If unknown, say 'Not sure.'"
 }
 
+# Sentence end for early display: punctuation already followed by whitespace,
+# so a streamed "3." is not cut before its "5"; very short openers are skipped
+_SENTENCE_END = re.compile(r"[.!?](?=\s)")
+MIN_SENTENCE_CHARS = 20
+
 
 class LLMClient:
     """Client for OpenAI-compatible LLM endpoint."""
     
-    def __init__(self, cfg: Config):
+    def __init__(self, cfg: Config, pool: Optional[HttpPool] = None):
         self.cfg = cfg
-        self.base_url = cfg.llm_base_url
-        self.model = cfg.llm_model
-        self.timeout = cfg.llm_timeout_sec
+        # name -> (base_url, model, timeout_sec); summaries always go to "local"
+        self.endpoints = {"local": (cfg.llm_base_url, cfg.llm_model, cfg.llm_timeout_sec)}
+        if cfg.llm_remote_base_url:
+            self.endpoints["remote"] = (cfg.llm_remote_base_url, cfg.llm_remote_model,
+                                        cfg.llm_remote_timeout_sec)
+        self.pool = pool or shared_pool()  # keep-alive connections across requests
+        self.latency_ms = collections.deque(maxlen=200)
+        self.first_token_ms = collections.deque(maxlen=200)
+        
+        # Questions race local and remote endpoints when both are configured
+        self.hedger = None
+        if "remote" in self.endpoints:
+            prefer_remote = cfg.llm_hedge == "remote"
+            self.hedger = Hedger(
+                ["remote", "local"] if prefer_remote else ["local", "remote"],
+                prefer="remote" if prefer_remote else None,
+                deadline_sec=cfg.llm_remote_deadline_ms / 1000.0,
+                delay_ms=None if cfg.llm_hedge_delay_ms < 0 else cfg.llm_hedge_delay_ms
+            )
+    
+    @staticmethod
+    def _payload(model: str, system: str, user: str, stream: bool,
+                 max_tokens: Optional[int] = None) -> dict:
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            "temperature": 0.2,
+            "stream": stream
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        return payload
+    
+    @staticmethod
+    def _log_usage(usage: dict):
+        if usage:
+            log.info(f"llm: {usage.get('prompt_tokens')} prompt / "
+                     f"{usage.get('completion_tokens')} completion tokens")
     
-    async def _chat(self, system: str, user: str) -> str:
-        """Send chat completion request to LLM."""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+    async def stream(self, system: str, user: str, max_tokens: Optional[int] = None,
+                     endpoint: str = "local") -> AsyncIterator[str]:
+        """Yield content deltas from a streamed (SSE) chat completion."""
+        base_url, model, timeout = self.endpoints[endpoint]
+        client = self.pool.client(base_url)
+        async with client.stream(
+            "POST",
+            f"{base_url}/chat/completions",
+            json=self._payload(model, system, user, stream=True, max_tokens=max_tokens),
+            timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    # Read on to the end of the body so the connection goes back to the pool
+                    continue
+                chunk = json.loads(data)
+                self._log_usage(chunk.get("usage"))
+                choices = chunk.get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    yield delta
+    
+    async def _chat(self, system: str, user: str,
+                    on_sentence: Optional[Callable[[str], None]] = None,
+                    max_tokens: Optional[int] = None, endpoint: str = "local") -> str:
+        """Send chat completion request to LLM.
+        
+        When streaming, `on_sentence` is called once with the first complete
+        sentence so the caller can show it before the rest is generated.
+        """
+        start = time.monotonic()
+        first = None
+        
+        if self.cfg.llm_stream:
+            parts = []
+            async for delta in self.stream(system, user, max_tokens, endpoint):
+                if first is None:
+                    first = time.monotonic()
+                parts.append(delta)
+                if on_sentence is not None:
+                    text = "".join(parts)
+                    match = _SENTENCE_END.search(text, MIN_SENTENCE_CHARS)
+                    if match:
+                        on_sentence(text[:match.end()].strip())
+                        on_sentence = None
+            answer = "".join(parts).strip()
+        else:
+            base_url, model, timeout = self.endpoints[endpoint]
+            client = self.pool.client(base_url)
             response = await client.post(
-                f"{self.base_url}/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": user}
-                    ],
-                    "temperature": 0.2,
-                    "stream": False
-                }
+                f"{base_url}/chat/completions",
+                json=self._payload(model, system, user, stream=False, max_tokens=max_tokens),
+                timeout=timeout
             )
             response.raise_for_status()
             data = response.json()
-            return data["choices"][0]["message"]["content"].strip()
+            self._log_usage(data.get("usage"))
+            answer = data["choices"][0]["message"]["content"].strip()
+        
+        # Time to first token and total latency (equal when not streaming)
+        total_ms = (time.monotonic() - start) * 1000.0
+        first_ms = (first - start) * 1000.0 if first is not None else total_ms
+        self.latency_ms.append(total_ms)
+        self.first_token_ms.append(first_ms)
+        log.info(f"llm: {endpoint} first token {first_ms:.0f} ms, total {total_ms:.0f} ms")
+        return answer
+    
+    def stats(self) -> dict:
+        def p50(values):
+            return round(float(np.median(values))) if values else 0
+        stats = {
+            "requests": len(self.latency_ms),
+            "first_token_p50_ms": p50(self.first_token_ms),
+            "total_p50_ms": p50(self.latency_ms)
+        }
+        if self.hedger:
+            stats.update(self.hedger.stats())
+        return stats
     
     async def summarize_memory(self, text: str) -> str:
         """Summarize text as a memory note."""
         return await self._chat(SYSTEM_PROMPTS["memory"], text)
     
+    async def summarize_memory_brief(self, text: str) -> str:
+        """Short memory note from the trigger line alone (used under backlog)."""
+        return await self._chat(SYSTEM_PROMPTS["memory_brief"], text, max_tokens=24)
+    
     async def summarize_todo(self, text: str) -> str:
         """Extract actionable to-do from text."""
         return await self._chat(SYSTEM_PROMPTS["todo"], text)
     
-    async def answer_question(self, text: str) -> str:
-        """Answer a question from text."""
-        return await self._chat(SYSTEM_PROMPTS["question"], text)
+    async def answer_question(self, text: str,
+                              on_sentence: Optional[Callable[[str], None]] = None) -> str:
+        """Answer a question from text, hedged across endpoints when a remote is set."""
+        if self.hedger is None:
+            return await self._chat(SYSTEM_PROMPTS["question"], text, on_sentence)
+        
+        # Early text only from the endpoint expected to win: the preferred one,
+        # else the one launched first; a loser's opening or a shrug is never shown
+        early_from = self.hedger.prefer or self.hedger.order[0]
+        
+        def first_sentence(sentence: str):
+            if on_sentence is not None and is_acceptable(sentence):
+                on_sentence(sentence)
+        
+        def ask(endpoint: str):
+            early = first_sentence if endpoint == early_from else None
+            return lambda: self._chat(SYSTEM_PROMPTS["question"], text, early, endpoint=endpoint)
+        
+        answer, winner = await self.hedger.run({name: ask(name) for name in self.endpoints})
+        log.info(f"llm: answer from {winner}")
+        return answer
@@ -0,0 +1,166 @@
+"""Priority scheduling of LLM-bound events with a concurrency limit."""
+import asyncio
+import collections
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+import numpy as np
+
+log = logging.getLogger("llm_sched")
+
+# Lower runs first: a waiting user beats a to-do, which beats a diary note
+PRIORITIES = {"question": 0, "todo": 1, "memory": 2}
+
+
+class _Job:
+    __slots__ = ("event", "kind", "queued", "deadline", "cheap")
+
+    def __init__(self, event: dict, queued: float, deadline: float):
+        self.event = event
+        self.kind = event["type"]
+        self.queued = queued
+        self.deadline = deadline
+        self.cheap = False
+
+
+class LLMScheduler:
+    """Runs events through `handle` by priority, at most `concurrency` at a time.
+
+    Jobs past their per-type deadline are dropped when they reach the front
+    (a late answer is worse than none). While the queue is at least
+    `backlog_depth` deep, memory events are either run with a cheaper prompt
+    (`backlog_memory="cheap"`) or set aside until the queue drains ("defer");
+    deferred jobs are capped at `max_deferred` and expire after `defer_sec`.
+
+    At most `max_queued` jobs wait. A full queue sheds its lowest-priority
+    job for a more important newcomer; otherwise `submit` waits for space,
+    which pushes back on the intent router through its bounded event queue.
+    """
+
+    def __init__(self, handle: Callable[[dict, bool], Awaitable[None]], concurrency: int = 2,
+                 deadlines: Dict[str, float] = None, backlog_depth: int = 4,
+                 backlog_memory: str = "cheap", max_queued: int = 32,
+                 max_deferred: int = 32, defer_sec: float = 300.0):
+        self.handle = handle
+        self.concurrency = max(1, concurrency)
+        self.deadlines = deadlines or {}
+        self.backlog_depth = backlog_depth
+        self.backlog_memory = backlog_memory
+        self.max_queued = max(1, max_queued)
+        self.max_deferred = max_deferred
+        self.defer_sec = defer_sec
+
+        self.heap = []  # (priority, seq, job)
+        self.deferred = collections.deque()
+        self.wake = asyncio.Event()
+        self.space = asyncio.Event()
+        self._seq = 0
+        self.running = 0
+
+        self.waits = {kind: collections.deque(maxlen=200) for kind in PRIORITIES}
+        self.expired = 0
+        self.degraded = 0
+        self.deferrals = 0
+        self.shed = 0
+
+    def _push(self, job: _Job):
+        self._seq += 1
+        heapq.heappush(self.heap, (PRIORITIES.get(job.kind, len(PRIORITIES)), self._seq, job))
+        self.wake.set()
+
+    async def submit(self, event: dict):
+        """Queue an event, waiting for space if the queue is full of equal or higher priority."""
+        priority = PRIORITIES.get(event["type"], len(PRIORITIES))
+        while len(self.heap) >= self.max_queued:
+            # Lowest priority, newest first among equals
+            worst = max(self.heap)
+            if worst[0] > priority:
+                self.heap.remove(worst)
+                heapq.heapify(self.heap)
+                self.shed += 1
+                log.warning(f"llm_sched: queue full, shed a {worst[2].kind} for a {event['type']}")
+                break
+            self.space.clear()
+            await self.space.wait()
+
+        now = time.monotonic()
+        limit = self.deadlines.get(event["type"], 0)
+        self._push(_Job(event, now, now + limit if limit > 0 else float("inf")))
+
+    def _backlogged(self) -> bool:
+        return self.backlog_depth > 0 and len(self.heap) >= self.backlog_depth
+
+    def _defer(self, job: _Job):
+        """Set a memory job aside, capped and with a deadline of its own."""
+        now = time.monotonic()
+        job.deadline = min(job.deadline, now + self.defer_sec)
+        while self.deferred and (self.deferred[0].deadline < now or len(self.deferred) >= self.max_deferred):
+            self.deferred.popleft()
+            self.expired += 1
+        self.deferrals += 1
+        self.deferred.append(job)
+
+    async def _next(self) -> _Job:
+        """Highest-priority job that is still worth running."""
+        while True:
+            if not self.heap and self.deferred:
+                # Idle again: deferred memory events get their turn (expired ones drop at pop)
+                for job in self.deferred:
+                    self._push(job)
+                self.deferred.clear()
+
+            if not self.heap:
+                self.wake.clear()
+                await self.wake.wait()
+                continue
+
+            # Depth before popping: the job itself counts towards the backlog
+            backlogged = self._backlogged()
+            _, _, job = heapq.heappop(self.heap)
+            self.space.set()
+            if time.monotonic() > job.deadline:
+                self.expired += 1
+                log.warning(f"llm_sched: dropped {job.kind} after "
+                            f"{time.monotonic() - job.queued:.1f}s in queue (deadline passed)")
+                continue
+
+            if job.kind == "memory" and backlogged:
+                if self.backlog_memory == "defer":
+                    self._defer(job)
+                    continue
+                job.cheap = True
+                self.degraded += 1
+            return job
+
+    async def _worker(self):
+        while True:
+            job = await self._next()
+            self.waits[job.kind].append((time.monotonic() - job.queued) * 1000.0)
+            self.running += 1
+            try:
+                await self.handle(job.event, job.cheap)
+            except Exception as e:
+                log.error(f"llm_sched: {job.kind} failed: {e}", exc_info=True)
+            finally:
+                self.running -= 1
+
+    async def run(self):
+        await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+
+    def stats(self) -> dict:
+        stats = {
+            "queued": len(self.heap),
+            "running": self.running,
+            "deferred": len(self.deferred),
+            "expired": self.expired,
+            "degraded": self.degraded,
+            "deferrals": self.deferrals,
+            "shed": self.shed
+        }
+        for kind, waits in self.waits.items():
+            if waits:
+                stats[f"{kind}_wait_p50_ms"] = round(float(np.median(waits)))
+                stats[f"{kind}_wait_max_ms"] = round(max(waits))
+        return stats
@@ -7,16 +7,28 @@ from dotenv import load_dotenv
 from core2.config import Config
 from core2.logging_setup import setup_logging
 from core2.audio import AudioCapture
+from core2.ring import FrameRing
 from core2.vad import VADProcessor
 from core2.asr import ASRWorker
 from core2.intent import IntentRouter
 from core2.events import EventProcessor
 from core2.display import Display
+from core2.http_pool import HttpPool, configure as configure_http
 from location.gps_tachyon import TachyonGPS
 
 log = logging.getLogger("main")
 
 
+async def report_stats(interval: int, components: dict):
+    """Periodically log the counters exposed by pipeline components."""
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        for name, component in components.items():
+            log.info(f"stats: {name} {component.stats()}")
+
+
 async def main():
     """Main application loop."""
     # Load environment variables
@@ -27,12 +39,20 @@ async def main():
     setup_logging(cfg.log_dir, cfg.log_level)
     log.info("earshot: starting...")
     
-    # Create async queues for pipeline
-    frame_queue = asyncio.Queue(maxsize=8)
+    # Create async queues for pipeline (audio frames go through a preallocated ring)
+    frame_queue = FrameRing(cfg.audio_ring_frames, cfg.audio_wake_frames)
     speech_queue = asyncio.Queue(maxsize=4)
     text_queue = asyncio.Queue(maxsize=16)
     event_queue = asyncio.Queue(maxsize=8)
     
+    # Shared keep-alive HTTP pools, closed on shutdown
+    http = configure_http(HttpPool(
+        cfg.http_max_connections,
+        cfg.http_max_keepalive,
+        cfg.http_keepalive_sec,
+        cfg.http2
+    ))
+    
     # Initialize components
     gps = TachyonGPS(simulation=cfg.simulation_mode)
     display = Display(cfg)
@@ -40,7 +60,7 @@ async def main():
     audio = AudioCapture(cfg, frame_queue)
     vad = VADProcessor(cfg, frame_queue, speech_queue)
     asr = ASRWorker(cfg, speech_queue, text_queue)
-    router = IntentRouter(cfg, text_queue, event_queue)
+    router = IntentRouter(cfg, text_queue, event_queue, refine=asr.refine)
     processor = EventProcessor(cfg, event_queue, gps, display)
     
     # Initialize display
@@ -48,6 +68,12 @@ async def main():
     
     # Start audio capture
     await audio.start()
+    stats = {"audio": frame_queue, "vad": vad, "asr": asr, "intent": router,
+             "llm": processor.llm, "llm_queue": processor.scheduler, "http": http}
+    if processor.answers:
+        stats["answers"] = processor.answers
+    if audio.source:
+        stats["replay"] = audio.source
     
     log.info("earshot: all components started")
     
@@ -55,13 +81,17 @@ async def main():
         # Run all async workers
         await asyncio.gather(
             gps.run(cfg.gps_poll_sec),
+            report_stats(cfg.stats_log_sec, stats),
             vad.run(),
             asr.run(),
             router.run(),
+            router.watch_prototypes(),
+            router.scheduler.run(),
             processor.run()
         )
     finally:
         log.info("earshot: shutting down...")
+        await http.close()
         await display.clear()
 
 
@@ -0,0 +1,100 @@
+"""File-backed intent prototypes that can be edited while the pipeline runs."""
+import json
+import logging
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # optional: only needed for YAML prototype files
+    yaml = None
+
+log = logging.getLogger("prototypes")
+
+
+class PrototypeSet(NamedTuple):
+    """Immutable snapshot of prototype embeddings, swapped in as a whole."""
+    labels: List[str]
+    texts: List[str]        # every example, grouped by label
+    raw: np.ndarray         # (examples x dim) model outputs
+    starts: np.ndarray      # first row of each label in `texts`
+    means: np.ndarray       # (labels x dim) normalized mean vector per label
+    examples: np.ndarray    # (examples x dim) normalized example vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-9)
+
+
+def build_prototype_set(prototypes: Dict[str, List[str]], raw: np.ndarray) -> PrototypeSet:
+    """Derive label means and normalized examples from raw example vectors."""
+    labels = list(prototypes)
+    texts = [text for label in labels for text in prototypes[label]]
+    counts = [len(prototypes[label]) for label in labels]
+    starts = np.cumsum([0] + counts[:-1])
+
+    raw = np.asarray(raw, dtype=np.float32)
+    means = np.stack([raw[s:s + n].mean(axis=0) for s, n in zip(starts, counts)])
+    return PrototypeSet(labels, texts, raw, starts, _normalize(means), _normalize(raw))
+
+
+def load_prototypes(path: str) -> Dict[str, List[str]]:
+    """Read and validate a JSON or YAML mapping of label -> example sentences."""
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("prototypes: YAML files need the 'PyYAML' package")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if not isinstance(data, dict) or not data:
+        raise ValueError("expected a mapping of label -> list of examples")
+    prototypes = {}
+    for label, examples in data.items():
+        if isinstance(examples, str):
+            examples = [examples]
+        examples = [str(e).strip() for e in examples or [] if str(e).strip()]
+        if not examples:
+            raise ValueError(f"label '{label}' has no examples")
+        prototypes[str(label)] = examples
+    return prototypes
+
+
+class PrototypeFile:
+    """Tracks a prototypes file by mtime so edits can be picked up by polling."""
+
+    def __init__(self, path: str, defaults: Dict[str, List[str]]):
+        self.path = os.path.expanduser(path)
+        self.defaults = defaults
+        self._stamp = None
+
+        # Seed the file with the built-in prototypes so there is something to edit
+        if not os.path.exists(self.path) and not self.path.lower().endswith((".yaml", ".yml")):
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(defaults, f, indent=2)
+                log.info(f"prototypes: wrote defaults to {self.path}")
+            except OSError as e:
+                log.warning(f"prototypes: cannot create {self.path}: {e}")
+
+    def _current_stamp(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def changed(self) -> bool:
+        return self._current_stamp() != self._stamp
+
+    def load(self) -> Dict[str, List[str]]:
+        """Load the file (the defaults if it does not exist); raises if it is invalid."""
+        # Remember the stamp first so a broken edit is reported once, not every poll
+        self._stamp = self._current_stamp()
+        if self._stamp is None:
+            return self.defaults
+        return load_prototypes(self.path)
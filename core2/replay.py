@@ -0,0 +1,139 @@
+"""Replay recorded WAV/FLAC audio through the pipeline instead of a microphone."""
+import asyncio
+import logging
+import os
+import time
+import wave
+from typing import List, Tuple
+
+import numpy as np
+
+from core2.resample import resample
+from core2.ring import FrameRing
+
+try:
+    import soundfile
+except ImportError:  # optional: only needed for FLAC
+    soundfile = None
+
+log = logging.getLogger("replay")
+
+AUDIO_EXTENSIONS = (".wav", ".flac")
+
+
+def list_audio_files(path: str) -> List[str]:
+    """Return a sorted list of audio files for a file or directory path."""
+    path = os.path.expanduser(path)
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                files.append(os.path.join(root, name))
+    return sorted(files)
+
+
+def read_audio(path: str) -> Tuple[np.ndarray, int]:
+    """Read an audio file as mono int16. Returns (samples, sample_rate)."""
+    if path.lower().endswith(".flac"):
+        if soundfile is None:
+            raise RuntimeError("replay: FLAC needs the 'soundfile' package")
+        data, rate = soundfile.read(path, dtype="int16", always_2d=True)
+        return data.mean(axis=1).astype(np.int16), rate
+
+    with wave.open(path, "rb") as wf:
+        rate = wf.getframerate()
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 2:
+        data = np.frombuffer(raw, dtype="<i2")
+    elif width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        data = (b[:, 1].astype(np.int16) | (b[:, 2].astype(np.int16) << 8))
+    elif width == 4:
+        data = (np.frombuffer(raw, dtype="<i4") >> 16).astype(np.int16)
+    else:
+        raise RuntimeError(f"replay: unsupported sample width {width} in {path}")
+
+    data = data.reshape(-1, channels)
+    if channels > 1:
+        data = data.mean(axis=1)
+    return data.reshape(-1).astype(np.int16), rate
+
+
+class FileSource:
+    """Streams audio files into the frame ring at a configurable pace.
+
+    `speed` 1.0 replays in real time, N replays N times faster, and 0 feeds
+    frames as fast as the consumers accept them. Every pace waits on a full
+    ring rather than dropping frames, so a replay that cannot keep up runs
+    slower than asked instead of losing audio.
+    """
+
+    def __init__(self, path: str, sample_rate: int, frame_ms: int,
+                 speed: float = 1.0, loop: bool = False):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.blocksize = int(sample_rate * (frame_ms / 1000.0))
+        self.speed = max(0.0, speed)
+        self.loop = loop
+
+        self.audio_sec = 0.0
+        self.wall_sec = 0.0
+        self.files_done = 0
+
+    async def run(self, ring: FrameRing):
+        """Feed every file into the ring, then log the achieved real-time factor."""
+        files = list_audio_files(self.path)
+        if not files:
+            log.error(f"replay: no audio files found at {self.path}")
+            return
+
+        log.info(f"replay: {len(files)} file(s) from {self.path}, speed={self.speed or 'max'}")
+        frame_sec = self.blocksize / float(self.sample_rate)
+        start = time.monotonic()
+        sent = 0
+
+        while True:
+            for path in files:
+                try:
+                    samples, rate = read_audio(path)
+                except Exception as e:
+                    log.warning(f"replay: skipping {path}: {e}")
+                    continue
+                if rate != self.sample_rate:
+                    samples = resample(samples, rate, self.sample_rate)
+                log.info(f"replay: {os.path.basename(path)} "
+                         f"({len(samples) / self.sample_rate:.1f}s, {rate} Hz)")
+
+                for i in range(0, len(samples), self.blocksize):
+                    frame = samples[i:i + self.blocksize]
+                    # Never drop replayed frames: RTF and accuracy must cover all the audio
+                    await ring.put(frame)
+                    if self.speed > 0:
+                        sent += 1
+                        # Sleep only once we are a few frames ahead of schedule
+                        ahead = start + sent * frame_sec / self.speed - time.monotonic()
+                        if ahead > 0.005:
+                            await asyncio.sleep(ahead)
+                    self.audio_sec += len(frame) / self.sample_rate
+
+                self.files_done += 1
+
+            if not self.loop:
+                break
+
+        self.wall_sec = time.monotonic() - start
+        log.info(f"replay: done, {self.audio_sec:.1f}s audio in {self.wall_sec:.1f}s "
+                 f"({self.audio_sec / max(self.wall_sec, 1e-6):.1f}x real time)")
+
+    def stats(self) -> dict:
+        return {
+            "files": self.files_done,
+            "audio_sec": round(self.audio_sec, 1)
+        }
@@ -0,0 +1,94 @@
+"""Streaming polyphase resampler used right after capture."""
+import logging
+from math import gcd
+
+import numpy as np
+
+log = logging.getLogger("resample")
+
+# Rate expected by Silero and Vosk
+TARGET_RATE = 16000
+
+
+def _design_filter(up: int, down: int, half_taps: int) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass for an up/down rational resampler."""
+    ratio = max(up, down)
+    taps_per_phase = 2 * half_taps * int(np.ceil(down / up)) if down > up else 2 * half_taps
+    n = taps_per_phase * up
+    # Cut off a little below the narrower Nyquist band to leave a transition
+    cutoff = 0.9 / ratio
+    t = np.arange(n) - (n - 1) / 2.0
+    h = cutoff * np.sinc(cutoff * t) * np.kaiser(n, 8.0)
+    h *= up / h.sum()
+    return h.astype(np.float32)
+
+
+class Resampler:
+    """Stateful rational resampler from int16 input to float32 [-1, 1] output.
+
+    The filter is split into `up` polyphase branches so each output sample is a
+    single dot product over `taps` input samples; a whole frame is computed
+    with one gather and one reduction. Filter history and the fractional
+    phase carry across calls, so frames join without clicks or drift.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int = TARGET_RATE, half_taps: int = 12):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        g = gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.passthrough = self.up == self.down
+
+        h = _design_filter(self.up, self.down, half_taps)
+        self.taps = len(h) // self.up
+        # bank[p, j] = h[p + j * up]
+        self.bank = np.ascontiguousarray(h.reshape(self.taps, self.up).T)
+        self._hist = np.zeros(self.taps - 1, dtype=np.float32)
+        self._pos = 0  # next output position relative to the block start, in upsampled units
+        self._k = np.arange(self.taps)
+
+        if not self.passthrough:
+            log.info(f"resample: {in_rate} -> {out_rate} Hz "
+                     f"(L={self.up}, M={self.down}, {self.taps} taps/phase)")
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """Resample one int16 frame; returns float32 samples at `out_rate`."""
+        x = frame.reshape(-1).astype(np.float32)
+        x *= 1.0 / 32768.0
+        if self.passthrough:
+            return x
+
+        limit = len(x) * self.up
+        if self._pos >= limit:
+            count = 0
+        else:
+            count = -(-(limit - self._pos) // self.down)
+        buf = np.concatenate((self._hist, x))
+
+        pos = self._pos + self.down * np.arange(count)
+        n = pos // self.up + (self.taps - 1)
+        idx = n[:, np.newaxis] - self._k[np.newaxis, :]
+        y = np.einsum("ij,ij->i", buf[idx], self.bank[pos % self.up])
+
+        self._pos += count * self.down - limit
+        self._hist = buf[len(buf) - (self.taps - 1):]
+        return y.astype(np.float32, copy=False)
+
+    def reset(self):
+        self._hist[:] = 0.0
+        self._pos = 0
+
+
+def to_int16(y: np.ndarray) -> np.ndarray:
+    """Convert float32 [-1, 1] samples back to int16 PCM."""
+    return np.clip(y * 32768.0, -32768, 32767).astype(np.int16)
+
+
+def resample(samples: np.ndarray, in_rate: int, out_rate: int = TARGET_RATE) -> np.ndarray:
+    """Resample a whole int16 recording, one second at a time to bound memory."""
+    r = Resampler(in_rate, out_rate)
+    chunks = [r.process(samples[i:i + in_rate]) for i in range(0, len(samples), in_rate)]
+    if not chunks:
+        return samples
+    return to_int16(np.concatenate(chunks))
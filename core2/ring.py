@@ -0,0 +1,145 @@
+"""Preallocated int16 ring buffer between the audio callback and the pipeline."""
+import asyncio
+import logging
+from typing import Optional
+
+import numpy as np
+
+log = logging.getLogger("ring")
+
+
+class FrameRing:
+    """Single-producer/single-consumer ring of fixed-size int16 frames.
+
+    The producer (PortAudio callback thread) only copies into a preallocated
+    slot and bumps a counter; no coroutine, future or array is created per
+    frame. The consumer side is queue-like (`get`, `get_nowait`, `qsize`) so
+    it can be handed to `VADProcessor` in place of an `asyncio.Queue`, and is
+    only woken once every `wake_frames` frames.
+
+    Frames returned by `get` are zero-copy views into the ring and stay valid
+    until the next `get`/`get_nowait` call; copy them if they must outlive
+    that.
+    """
+
+    def __init__(self, capacity: int = 100, wake_frames: int = 4):
+        self.capacity = max(2, capacity)
+        self.wake_frames = max(1, min(wake_frames, self.capacity))
+        self.frame_len = 0
+        self.sample_rate = 0
+        self.frame_sec = 0.0
+
+        self._buf: Optional[np.ndarray] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._waiting = False
+        self._pending = False
+
+        # Monotonic counters; each is written by exactly one side
+        self._write = 0
+        self._read = 0
+
+        self.overruns = 0   # frames dropped because the consumer fell behind
+        self.underruns = 0  # reader deadlines that passed without a full batch
+
+    def configure(self, frame_len: int, sample_rate: int):
+        """Allocate the ring for the given frame size (call before producing)."""
+        self._loop = asyncio.get_running_loop()
+        self.frame_len = frame_len
+        self.sample_rate = sample_rate
+        self.frame_sec = frame_len / float(sample_rate)
+        self._buf = np.zeros((self.capacity, frame_len), dtype=np.int16)
+        self._write = self._read = 0
+        self._pending = False
+        log.info(f"ring: {self.capacity} x {frame_len} samples @ {sample_rate} Hz, "
+                 f"wake every {self.wake_frames} frames")
+
+    def qsize(self) -> int:
+        """Number of frames ready for the consumer."""
+        return self._write - self._read - (1 if self._pending else 0)
+
+    def full(self) -> bool:
+        return self._write - self._read >= self.capacity
+
+    def write(self, block: np.ndarray) -> bool:
+        """Copy one frame into the ring. Safe to call from the audio thread.
+
+        Returns False (and counts an overrun) if the ring is full.
+        """
+        if self._buf is None:
+            return False
+        if self._write - self._read >= self.capacity:
+            self.overruns += 1
+            return False
+
+        slot = self._buf[self._write % self.capacity]
+        flat = block.reshape(-1)
+        n = min(len(flat), self.frame_len)
+        slot[:n] = flat[:n]
+        if n < self.frame_len:
+            slot[n:] = 0
+        self._write += 1
+
+        if self._waiting and self.qsize() >= self.wake_frames:
+            self._waiting = False
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    async def put(self, block: np.ndarray):
+        """Write a frame from the event loop, waiting while the ring is full."""
+        while self.full():
+            self._space.clear()
+            await self._space.wait()
+        self.write(block)
+
+    def _release(self):
+        """Hand the slot of the previously returned frame back to the producer."""
+        if self._pending:
+            self._pending = False
+            self._read += 1
+            self._space.set()
+
+    def get_nowait(self) -> np.ndarray:
+        """Return the next frame as a view, or raise `asyncio.QueueEmpty`."""
+        self._release()
+        if self._write == self._read:
+            raise asyncio.QueueEmpty
+        self._pending = True
+        return self._buf[self._read % self.capacity]
+
+    async def get(self) -> np.ndarray:
+        """Return the next frame, sleeping until `wake_frames` are buffered."""
+        self._release()
+        if self._write == self._read:
+            await self._wait_batch()
+        self._pending = True
+        return self._buf[self._read % self.capacity]
+
+    async def _wait_batch(self):
+        while True:
+            self._wakeup.clear()
+            self._waiting = True
+            # Re-check after publishing the flag to avoid a lost wakeup
+            if self._write - self._read >= self.wake_frames:
+                self._waiting = False
+                return
+
+            timeout = None
+            if self.frame_sec:
+                timeout = 2 * self.wake_frames * self.frame_sec
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                self._waiting = False
+                self.underruns += 1
+
+            if self._write != self._read:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "buffered": self.qsize(),
+            "overruns": self.overruns,
+            "underruns": self.underruns
+        }
@@ -0,0 +1,131 @@
+"""Time-indexed rolling transcript used for event context windows."""
+import bisect
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+class RollingBuffer:
+    """Recent transcript lines in parallel timestamp/text lists.
+
+    Window queries are two bisects plus a join of just the matching lines,
+    and the last joined window is kept so overlapping queries only append
+    new lines or trim old ones. Memory is bounded by time, entry count and
+    total text bytes, whichever is hit first.
+    """
+
+    def __init__(self, pre_sec: int, post_sec: int, max_entries: int = 2000, max_bytes: int = 256 * 1024):
+        self.pre_sec = pre_sec
+        self.post_sec = post_sec
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.retain_sec = pre_sec + post_sec + 60
+
+        self.ts: List[float] = []
+        self.texts: List[str] = []
+        self._head = 0      # entries before this index are evicted, awaiting compaction
+        self._offset = 0    # entries removed by compaction; absolute index = list index + offset
+        self._bytes = 0
+        self._dead_bytes = 0  # evicted but not yet compacted
+        self._window: Optional[Tuple[int, int, str]] = None  # (abs_lo, abs_hi, joined)
+        self.window_reuse = 0
+
+    def __len__(self) -> int:
+        return len(self.ts) - self._head
+
+    def add(self, text: str, ts: float = None):
+        """Add text with its timestamp (default: now), keeping timestamps sorted."""
+        now = ts if ts is not None else time.time()
+        if not self.ts or now >= self.ts[-1]:
+            self.ts.append(now)
+            self.texts.append(text)
+        else:
+            # Late arrival (e.g. a slow ASR worker): insert in order, which shifts indices
+            i = bisect.bisect_right(self.ts, now, self._head)
+            self.ts.insert(i, now)
+            self.texts.insert(i, text)
+            self._window = None
+        self._bytes += len(text.encode("utf-8"))
+
+        # Evict by age, then by the entry and byte caps
+        cutoff = self.ts[-1] - self.retain_sec
+        while len(self) > 1 and (self.ts[self._head] < cutoff or len(self) > self.max_entries
+                                 or self._bytes > self.max_bytes):
+            size = len(self.texts[self._head].encode("utf-8"))
+            self._bytes -= size
+            self._dead_bytes += size
+            self._head += 1
+
+        # Compact once the evicted prefix outgrows the live part or a quarter of the byte cap
+        if self._head and (self._head * 2 > len(self.ts) or self._dead_bytes * 4 > self.max_bytes):
+            del self.ts[:self._head]
+            del self.texts[:self._head]
+            self._offset += self._head
+            self._head = 0
+            self._dead_bytes = 0
+            self._window = None
+
+    def _range(self, start: float, end: float) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.ts, start, self._head)
+        hi = bisect.bisect_right(self.ts, end, lo)
+        return lo, hi
+
+    def get_window(self, center_ts: float) -> str:
+        """Get text within time window around center timestamp."""
+        lo, hi = self._range(center_ts - self.pre_sec, center_ts + self.post_sec)
+        return self.join(lo, hi)
+
+    def get_budgeted_window(self, center_ts: float, budget: int,
+                            count: Callable[[List[str]], List[int]]) -> Tuple[str, int, int, int]:
+        """Lines of the window nearest the trigger that fit in `budget` tokens.
+
+        Grows outward from the line at `center_ts`, taking whichever neighbour
+        is closer in time, and returns (text, tokens, lines_kept, lines_total)
+        with the kept lines in time order. A budget of 0 keeps the whole window.
+        """
+        lo, hi = self._range(center_ts - self.pre_sec, center_ts + self.post_sec)
+        if lo == hi:
+            return "", 0, 0, 0
+        counts = count(self.texts[lo:hi])
+        if budget <= 0 or sum(counts) <= budget:
+            return self.join(lo, hi), sum(counts), hi - lo, hi - lo
+
+        # The trigger line is always kept, even if it alone exceeds the budget
+        mid = min(bisect.bisect_left(self.ts, center_ts, lo, hi), hi - 1)
+        left, right = mid - 1, mid + 1
+        used = counts[mid - lo]
+        while True:
+            take_left = left >= lo and (right >= hi or center_ts - self.ts[left] <= self.ts[right] - center_ts)
+            i = left if take_left else right
+            if i < lo or i >= hi or used + counts[i - lo] > budget:
+                break
+            used += counts[i - lo]
+            if take_left:
+                left -= 1
+            else:
+                right += 1
+        return " ".join(self.texts[left + 1:right]), used, right - left - 1, hi - lo
+
+    def join(self, lo: int, hi: int) -> str:
+        """Join texts[lo:hi], reusing the previous window where the ranges overlap."""
+        abs_lo, abs_hi = lo + self._offset, hi + self._offset
+        cached = self._window
+        if cached and cached[0] <= abs_lo < cached[1] <= abs_hi:
+            c_lo, c_hi, joined = cached
+            # Trim lines that fell out of the front, then append the new tail
+            drop = sum(len(t) + 1 for t in self.texts[c_lo - self._offset:lo])
+            joined = joined[drop:]
+            tail = self.texts[c_hi - self._offset:hi]
+            if tail:
+                joined = joined + " " + " ".join(tail)
+            self.window_reuse += 1
+        else:
+            joined = " ".join(self.texts[lo:hi])
+        self._window = (abs_lo, abs_hi, joined)
+        return joined
+
+    def stats(self) -> dict:
+        return {
+            "context_entries": len(self),
+            "context_kb": round(self._bytes / 1024, 1),
+            "context_window_reuse": self.window_reuse
+        }
@@ -0,0 +1,119 @@
+"""Compiled keyword rules that decide obvious intents before the embedding model."""
+import json
+import logging
+import os
+import re
+from typing import List, NamedTuple, Optional
+
+from core2.embedding_cache import normalize_text
+
+try:
+    import yaml
+except ImportError:  # optional: only needed for YAML rule files
+    yaml = None
+
+log = logging.getLogger("rules")
+
+
+# Checked in order against normalized text (lower case, no edge punctuation);
+# the first matching rule decides. Vosk output has no punctuation, so
+# questions are recognised by their leading words.
+DEFAULT_RULES = [
+    {
+        "name": "filler",
+        "label": "ignore",
+        "confidence": 0.95,
+        "pattern": r"^(?:(?:yeah|yes|yep|yup|no|nope|nah|ok|okay|alright|all right|uh|um|uh huh|"
+                   r"mm|mhm|hmm|right|sure|thanks|thank you|bye|hi|hello|hey|cool|nice|wow|oh|"
+                   r"ah|haha|lol|great|fine|got it|i see|really)\s*)+$"
+    },
+    {
+        "name": "reminder",
+        "label": "todo",
+        "confidence": 0.95,
+        "pattern": r"\b(?:remind me|don't forget to|do not forget to|add (?:a )?(?:todo|to-do|to do|task)|"
+                   r"put .+ on (?:my|the) (?:list|todo list|to-do list)|make sure (?:i|to))\b"
+                   r"|^i need to\b"  # anchored: "do i need to ..." is a question
+    },
+    {
+        "name": "note",
+        "label": "memory",
+        "confidence": 0.9,
+        # A clause must follow: "note that down" is not a note
+        "pattern": r"^(?:remember|note|make a note|keep in mind) that\s+(?!down\b)\S+\s+\S+"
+                   r"|^for the record\b"
+    },
+    {
+        # Small talk shaped like a question, said to a person rather than the assistant
+        "name": "social",
+        "label": "ignore",
+        "confidence": 0.85,
+        "pattern": r"^(?:what's up|what is up|what's new|how's it going|how is it going|how are you|"
+                   r"how have you been|how was your (?:day|weekend|trip)|what do you mean|where are you)\b"
+    },
+    {
+        # Not when addressed to "you": those are mostly asked of someone in the room
+        "name": "wh_question",
+        "label": "question",
+        "confidence": 0.9,
+        "pattern": r"^(?!.*\byour?\b)(?:what|who|whom|whose|when|where|why|which|how)(?:'s|'re|\s+(?:is|"
+                   r"are|was|were|do|does|did|can|could|would|should|will|many|much|far|long|old|big|often))\b"
+    },
+    {
+        # One or two function words only; short commands like "buy milk" go to the model
+        "name": "short",
+        "label": "ignore",
+        "confidence": 0.8,
+        "pattern": r"^(?:(?:the|a|an|and|but|so|or|then|well|like|just|maybe|i|you|we|it|it's|"
+                   r"that|that's|this|is|was|me|too|again|anyway|whatever|what|huh)\s*){1,2}$"
+    }
+]
+
+
+class RuleMatch(NamedTuple):
+    label: str
+    confidence: float
+    rule: str
+
+
+class RuleSet:
+    """Ordered, pre-compiled regex rules mapping text to (label, confidence)."""
+
+    def __init__(self, rules: List[dict]):
+        self.rules = [
+            (r["name"], r["label"], float(r.get("confidence", 0.9)), re.compile(r["pattern"]))
+            for r in rules
+        ]
+        self.hits = {name: 0 for name, _, _, _ in self.rules}
+        self.checked = 0
+        log.info(f"rules: {len(self.rules)} rule(s) loaded")
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        """Load rules from a JSON or YAML list of {name, label, confidence, pattern}."""
+        path = os.path.expanduser(path)
+        with open(path, encoding="utf-8") as f:
+            if path.lower().endswith((".yaml", ".yml")):
+                if yaml is None:
+                    raise RuntimeError("rules: YAML rule files need the 'PyYAML' package")
+                rules = yaml.safe_load(f)
+            else:
+                rules = json.load(f)
+        return cls(rules)
+
+    def match(self, text: str) -> Optional[RuleMatch]:
+        """First rule matching the text, or None to leave it to the model."""
+        self.checked += 1
+        norm = normalize_text(text)
+        for name, label, confidence, pattern in self.rules:
+            if pattern.search(norm):
+                self.hits[name] += 1
+                return RuleMatch(label, confidence, name)
+        return None
+
+    def stats(self) -> dict:
+        total = sum(self.hits.values())
+        return {
+            "rule_hits": dict(self.hits),
+            "rule_hit_rate": round(total / self.checked, 3) if self.checked else 0.0
+        }
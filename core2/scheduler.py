@@ -0,0 +1,144 @@
+"""Timer-wheel scheduler that holds events until their post-context window closes."""
+import asyncio
+import heapq
+import logging
+import math
+from typing import Awaitable, Callable, List, Optional
+
+log = logging.getLogger("scheduler")
+
+
+class _Pending:
+    __slots__ = ("event", "close_ts", "scheduled", "hard_due", "tick", "done")
+
+    def __init__(self, event: dict, close_ts: float, scheduled: float, hard_due: float):
+        self.event = event
+        self.close_ts = close_ts      # transcript time at which the window is complete
+        self.scheduled = scheduled    # loop time when held
+        self.hard_due = hard_due      # loop time after which we stop waiting
+        self.tick = 0
+        self.done = False
+
+
+class EmissionScheduler:
+    """Delays event emission until enough post-trigger transcript has arrived.
+
+    An event is released when the first of these happens:
+      - a transcript timestamped past the end of its window arrives,
+      - nothing new has been heard for `silence_sec` (speech has stopped),
+      - `post_sec` of wall time has passed.
+    Wall-clock deadlines live in a hashed timer wheel (O(1) insert, one slot
+    visited per tick) and transcript-time closes in a heap, so the cost stays
+    flat with many pending events. `schedule` and `heard` never block.
+    """
+
+    def __init__(self, post_sec: float, silence_sec: float,
+                 emit: Callable[[dict], Awaitable[None]], tick_sec: float = 0.25, slots: int = 128):
+        self.post_sec = post_sec
+        self.silence_sec = silence_sec
+        self.emit = emit
+        self.tick_sec = tick_sec
+        self.wheel: List[List[_Pending]] = [[] for _ in range(slots)]
+        self.closing = []  # heap of (close_ts, seq, pending)
+        self.ready: List[_Pending] = []
+        self.wake = asyncio.Event()
+
+        self._origin: Optional[float] = None
+        self._tick = 0
+        self._seq = 0
+        self.last_heard = 0.0
+        self.latest_ts = 0.0
+
+        self.pending = 0
+        self.emitted = 0
+        self.closed_by = {"transcript": 0, "silence": 0, "timeout": 0}
+
+    def _now(self) -> float:
+        loop = asyncio.get_running_loop()
+        if self._origin is None:
+            self._origin = loop.time()
+        return loop.time()
+
+    def _due(self, p: _Pending) -> float:
+        if self.silence_sec <= 0:
+            return p.hard_due
+        return min(p.hard_due, max(self.last_heard, p.scheduled) + self.silence_sec)
+
+    def _arm(self, p: _Pending, due: float):
+        p.tick = max(self._tick + 1, math.ceil((due - self._origin) / self.tick_sec))
+        self.wheel[p.tick % len(self.wheel)].append(p)
+
+    def _release(self, p: _Pending, reason: str):
+        if p.done:
+            return
+        p.done = True
+        self.pending -= 1
+        self.closed_by[reason] += 1
+        self.ready.append(p)
+        self.wake.set()
+
+    def schedule(self, event: dict, trigger_ts: float):
+        """Hold an event whose context window is centered on `trigger_ts`."""
+        now = self._now()
+        p = _Pending(event, trigger_ts + self.post_sec, now, now + self.post_sec)
+        self.pending += 1
+        if self.post_sec <= 0 or self.latest_ts >= p.close_ts:
+            self._release(p, "transcript")
+            return
+        self._seq += 1
+        heapq.heappush(self.closing, (p.close_ts, self._seq, p))
+        self._arm(p, self._due(p))
+
+    def heard(self, ts: float):
+        """Note a new transcript; closes windows that it reaches past."""
+        self.last_heard = self._now()
+        self.latest_ts = max(self.latest_ts, ts)
+        while self.closing and self.closing[0][0] <= self.latest_ts:
+            _, _, p = heapq.heappop(self.closing)
+            self._release(p, "transcript")
+
+    def _advance(self):
+        """Visit the wheel slots for every tick that has elapsed."""
+        now = self._now()
+        target = int((now - self._origin) / self.tick_sec)
+        while self._tick < target:
+            self._tick += 1
+            index = self._tick % len(self.wheel)
+            slot = self.wheel[index]
+            if not slot:
+                continue
+            self.wheel[index] = []
+            for p in slot:
+                if p.done:
+                    continue
+                if p.tick > self._tick:
+                    self.wheel[index].append(p)  # due on a later revolution
+                    continue
+                due = self._due(p)
+                if due > now:
+                    self._arm(p, due)  # speech continued; silence cutoff moved later
+                else:
+                    self._release(p, "timeout" if due >= p.hard_due else "silence")
+
+    def stats(self) -> dict:
+        return {
+            "held": self.pending,
+            "emitted": self.emitted,
+            **{f"closed_{k}": v for k, v in self.closed_by.items()}
+        }
+
+    async def run(self):
+        """Release due events in the order they became ready."""
+        self._now()
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.tick_sec)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            self._advance()
+
+            ready, self.ready = self.ready, []
+            for p in ready:
+                await self.emit(p.event)
+                self.emitted += 1
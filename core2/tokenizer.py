@@ -0,0 +1,82 @@
+"""Lightweight tokenizer for the intent model, loaded straight from tokenizer.json."""
+import logging
+import os
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # optional: fall back to transformers
+    Tokenizer = None
+
+log = logging.getLogger("tokenizer")
+
+
+class FastTokenizer:
+    """Batch tokenizer with dynamic padding and a short truncation length.
+
+    Uses the `tokenizers` library directly on the model's tokenizer.json,
+    which avoids importing transformers (seconds of startup and a large RSS
+    on the device). Transformers' AutoTokenizer is only used when the file
+    or the library is missing.
+    """
+
+    def __init__(self, model_dir: str, max_length: int = 64):
+        self.max_length = max_length
+        self._counter = None
+        path = os.path.join(model_dir, "tokenizer.json")
+
+        if Tokenizer is not None and os.path.isfile(path):
+            self.tokenizer = Tokenizer.from_file(path)
+            # tokenizer.json ships with fixed padding to 128; pad to the longest text instead
+            padding = self.tokenizer.padding or {}
+            self.tokenizer.enable_padding(
+                pad_id=padding.get("pad_id", 0),
+                pad_type_id=padding.get("pad_type_id", 0),
+                pad_token=padding.get("pad_token", "[PAD]")
+            )
+            self.tokenizer.enable_truncation(max_length)
+            self.backend = "tokenizers"
+        else:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            self.backend = "transformers"
+
+        log.info(f"tokenizer: {self.backend} backend, max_length={max_length}")
+
+    def count(self, texts: List[str]) -> List[int]:
+        """Token count of each text, without special tokens or truncation."""
+        if self.backend == "tokenizers":
+            if self._counter is None:
+                # Separate instance: the batch tokenizer pads and truncates, and is used from another thread
+                self._counter = Tokenizer.from_str(self.tokenizer.to_str())
+                self._counter.no_padding()
+                self._counter.no_truncation()
+            return [len(e.ids) for e in self._counter.encode_batch(texts, add_special_tokens=False)]
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def __call__(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Tokenize a batch into int64 input_ids, attention_mask and token_type_ids."""
+        if self.backend == "tokenizers":
+            encodings = self.tokenizer.encode_batch(texts)
+            return {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        ids = inputs["input_ids"].astype(np.int64)
+        return {
+            "input_ids": ids,
+            "attention_mask": inputs["attention_mask"].astype(np.int64),
+            "token_type_ids": inputs["token_type_ids"].astype(np.int64)
+            if "token_type_ids" in inputs else np.zeros_like(ids)
+        }
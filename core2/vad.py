@@ -1,15 +1,199 @@
 """Voice Activity Detection (VAD) to filter speech from silence."""
 import asyncio
+import collections
 import logging
-import time
 import os
+from typing import List, Tuple
+
 import numpy as np
 import onnxruntime as ort
 
 from core2.config import Config
+from core2.resample import TARGET_RATE, Resampler
 
 log = logging.getLogger("vad")
 
+# Marker put on the speech queue after the last chunk of a streamed utterance
+SPEECH_END = "speech_end"
+
+# Silero (16 kHz) consumes 512-sample windows prefixed with 64 context samples
+SILERO_WINDOW = 512
+SILERO_CONTEXT = 64
+
+
+class SileroWindower:
+    """Re-chunks 20 ms frames into Silero-sized windows.
+    
+    Frames are pushed as they arrive; `flush` runs every complete window and
+    returns a decision for each frame whose last sample is now covered by a
+    window. A frame can therefore be reported one window late, but always in
+    order.
+    
+    Windows run one per session call, in order, with the recurrent state
+    threaded from each window to the next, also when a backlog is caught up:
+    Silero's state depends on every earlier window, so windows cannot share
+    an entry state in one batched call without losing speech.
+    """
+    
+    def __init__(self, session: ort.InferenceSession, threshold: float = 0.5):
+        self.session = session
+        self.threshold = threshold
+        self.silero_state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._context = np.zeros(SILERO_CONTEXT, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._frames = collections.deque()  # (frame, end sample index)
+        self._received = 0   # samples pushed
+        self._windowed = 0   # samples already run through the model
+        self._probs = collections.deque()  # (window end sample index, prob)
+        self._sr = np.array(TARGET_RATE, dtype=np.int64)
+        
+        self.calls = 0  # one model run per SILERO_WINDOW samples
+    
+    def push(self, frame: np.ndarray):
+        self._received += len(frame)
+        self._frames.append((frame, self._received))
+        self._pending = np.concatenate((self._pending, frame))
+    
+    def flush(self) -> List[Tuple[np.ndarray, bool]]:
+        for _ in range(len(self._pending) // SILERO_WINDOW):
+            self._run()
+        
+        decisions = []
+        while self._frames and self._frames[0][1] <= self._windowed:
+            frame, end = self._frames.popleft()
+            # Drop probabilities of windows that end before this frame's last sample
+            while self._probs[0][0] < end:
+                self._probs.popleft()
+            decisions.append((frame, self._probs[0][1] > self.threshold))
+        return decisions
+    
+    def drain(self) -> List[Tuple[np.ndarray, bool]]:
+        """Decide all pushed frames, zero-padding the last partial window."""
+        if len(self._pending):
+            pad = -len(self._pending) % SILERO_WINDOW
+            self._pending = np.concatenate((self._pending, np.zeros(pad, dtype=np.float32)))
+        decisions = self.flush()
+        self._windowed = self._received
+        return decisions
+    
+    def reset(self):
+        """Forget recurrent state and context, e.g. after a span that was not run."""
+        self.silero_state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._context[:] = 0.0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._frames.clear()
+        self._probs.clear()
+        self._received = self._windowed = 0
+    
+    def _run(self):
+        window = self._pending[:SILERO_WINDOW]
+        self._pending = self._pending[SILERO_WINDOW:]
+        
+        # Input is [previous 64 samples | 512-sample window]
+        inputs = np.concatenate((self._context, window))[np.newaxis, :]
+        self._context = window[-SILERO_CONTEXT:].copy()
+        
+        out, self.silero_state = self.session.run(None, {
+            "input": inputs,
+            "state": self.silero_state,
+            "sr": self._sr
+        })
+        
+        self._windowed += SILERO_WINDOW
+        self._probs.append((self._windowed, float(np.asarray(out).reshape(-1)[0])))
+        self.calls += 1
+
+
+class SegmentBuffer:
+    """Preallocated int16 utterance buffer, grown by doubling and reused.
+    
+    With `max_samples` set, `full()` turns true at that length and `split()`
+    emits everything up to the quietest 10 ms of the last second, keeping the
+    tail as the start of the next segment.
+    """
+    
+    def __init__(self, sample_rate: int, max_samples: int = 0, initial_sec: float = 5.0):
+        self.sample_rate = sample_rate
+        self.max_samples = max_samples
+        self._buf = np.zeros(int(sample_rate * initial_sec), dtype=np.int16)
+        self.length = 0
+    
+    @property
+    def duration(self) -> float:
+        return self.length / float(self.sample_rate)
+    
+    def append(self, frame: np.ndarray):
+        """Append a float32 frame, converting to int16 in place."""
+        end = self.length + len(frame)
+        if end > len(self._buf):
+            grown = np.zeros(max(end, 2 * len(self._buf)), dtype=np.int16)
+            grown[:self.length] = self._buf[:self.length]
+            self._buf = grown
+        self._buf[self.length:end] = np.clip(frame * 32768.0, -32768, 32767)
+        self.length = end
+    
+    def full(self) -> bool:
+        return self.max_samples > 0 and self.length >= self.max_samples
+    
+    def take(self) -> np.ndarray:
+        """Return the buffered segment (a copy) and empty the buffer."""
+        audio = self._buf[:self.length].copy()
+        self.length = 0
+        return audio
+    
+    def split(self) -> np.ndarray:
+        """Cut at the lowest-energy 10 ms block of the last second."""
+        block = self.sample_rate // 100
+        start = max(0, self.length - self.sample_rate)
+        tail = self._buf[start:self.length].astype(np.float32)
+        n_blocks = len(tail) // block
+        if n_blocks < 2:
+            return self.take()
+        energy = (tail[:n_blocks * block].reshape(n_blocks, block) ** 2).sum(axis=1)
+        cut = start + int(np.argmin(energy)) * block + block // 2
+        
+        audio = self._buf[:cut].copy()
+        remainder = self.length - cut
+        self._buf[:remainder] = self._buf[cut:self.length]
+        self.length = remainder
+        return audio
+
+
+class EnergyGate:
+    """Cheap first VAD stage: adaptive noise-floor energy plus zero-crossing rate.
+    
+    The noise floor follows quiet frames quickly downwards and slowly upwards,
+    so a frame is a speech candidate when it stands `margin_db` above the
+    floor, is not near-digital silence, and has a zero-crossing rate typical
+    of voice rather than hum (too low) or hiss/clicks (too high).
+    """
+    
+    MIN_DBFS = -60.0
+    ZCR_RANGE = (0.005, 0.45)
+    
+    def __init__(self, margin_db: float = 9.0):
+        self.margin_db = margin_db
+        self.floor_db = -50.0
+    
+    def check(self, frame: np.ndarray) -> bool:
+        rms = np.sqrt(np.mean(frame ** 2)) + 1e-9
+        level_db = 20.0 * np.log10(rms)
+        signs = np.signbit(frame)
+        zcr = np.count_nonzero(signs[1:] != signs[:-1]) / float(len(frame))
+        
+        candidate = (
+            level_db > self.floor_db + self.margin_db
+            and level_db > self.MIN_DBFS
+            and self.ZCR_RANGE[0] <= zcr <= self.ZCR_RANGE[1]
+        )
+        
+        # Track the floor on non-candidate frames: fast attack, slow release
+        if level_db < self.floor_db:
+            self.floor_db += 0.5 * (level_db - self.floor_db)
+        elif not candidate:
+            self.floor_db += 0.02 * (level_db - self.floor_db)
+        return candidate
+
 
 class VADProcessor:
     """Detects voice activity and gates audio to only pass speech segments."""
@@ -18,108 +202,182 @@ class VADProcessor:
         self.cfg = cfg
         self.frame_queue = frame_queue
         self.speech_queue = speech_queue
-        self.sample_rate = cfg.sample_rate
+        self.sample_rate = TARGET_RATE  # frames are resampled once on arrival
+        self.resampler = None
         self.frame_sec = cfg.frame_ms / 1000.0
         self.min_speech = cfg.vad_min_speech_ms / 1000.0
         self.max_silence = cfg.vad_max_silence_ms / 1000.0
+        self.max_segment = cfg.vad_max_segment_ms / 1000.0
+        
+        # Streaming mode forwards voiced audio as it arrives, then SPEECH_END
+        self.streaming = cfg.asr_streaming
+        self.stream_chunk = cfg.asr_stream_chunk_ms / 1000.0
+        self._streamed = 0.0
+        # Frames drained from a backed-up ring per wakeup (16 Silero windows)
+        frame_len = int(self.sample_rate * self.frame_sec)
+        self.max_drain = max(1, 16 * SILERO_WINDOW // frame_len)
+        
+        # "silero": Silero on every frame, "staged": energy/ZCR gate in front of
+        # Silero, "energy": fixed energy threshold only
+        self.mode = cfg.vad_mode
+        self.gate = EnergyGate(cfg.vad_gate_margin_db)
+        self.hangover_frames = int(cfg.vad_gate_hangover_ms / cfg.frame_ms)
+        self._hangover = 0
+        self._gate_open = False
+        self.frames_total = 0
+        self.frames_silero = 0
         
         # Try to load Silero VAD model
         self.silero = None
-        self.silero_state = None
         model_path = os.path.expanduser(cfg.silero_model_path)
         
-        if os.path.isfile(model_path):
+        if self.mode == "energy":
+            log.info("vad: energy-only mode")
+        elif os.path.isfile(model_path):
             try:
-                self.silero = ort.InferenceSession(
-                    model_path, 
+                session = ort.InferenceSession(
+                    model_path,
                     providers=["CPUExecutionProvider"]
                 )
-                self.silero_state = np.zeros((2, 1, 128), dtype=np.float32)
-                log.info("vad: using Silero ONNX model")
+                self.silero = SileroWindower(session)
+                log.info(f"vad: using Silero ONNX model, mode={self.mode}")
             except Exception as e:
                 log.warning(f"vad: Silero load failed, using energy-based fallback: {e}")
         else:
             log.info("vad: Silero model not found, using energy-based VAD")
     
+    def _resample(self, raw: np.ndarray) -> np.ndarray:
+        """Convert a captured int16 frame to float32 at 16 kHz (once per frame)."""
+        if self.resampler is None:
+            in_rate = getattr(self.frame_queue, "sample_rate", 0) or self.cfg.sample_rate
+            self.resampler = Resampler(in_rate, TARGET_RATE)
+        return self.resampler.process(raw)
+    
     def _is_speech(self, frame: np.ndarray) -> bool:
-        """Check if audio frame contains speech."""
-        if self.silero is not None:
-            # Normalize to float32 [-1, 1]
-            y = frame.astype(np.float32) / 32768.0
-            
-            # Silero expects 16kHz - resample if needed
-            if self.sample_rate == 48000:
-                y = y[::3]  # 48k -> 16k decimation
-                vad_sr = 16000
-            elif self.sample_rate == 44100:
-                y = y[::3]  # 44k -> ~15k approximation
-                vad_sr = 16000
+        """Energy-based check used when Silero is unavailable."""
+        # RMS of ~1000 on the int16 scale
+        energy = np.sqrt(np.mean(frame ** 2))
+        return energy > 1000 / 32768.0
+    
+    def _classify(self, frames: List[np.ndarray]) -> List[Tuple[np.ndarray, bool]]:
+        """Return (frame, is_speech) pairs, in order, for frames that are decided."""
+        self.frames_total += len(frames)
+        if self.silero is None:
+            if self.mode == "staged":
+                return [(frame, self.gate.check(frame)) for frame in frames]
+            return [(frame, self._is_speech(frame)) for frame in frames]
+        
+        if self.mode != "staged":
+            self.frames_silero += len(frames)
+            for frame in frames:
+                self.silero.push(frame)
+            return self.silero.flush()
+        
+        decisions = []
+        for frame in frames:
+            if self.gate.check(frame):
+                self._hangover = self.hangover_frames
+            elif self._hangover > 0:
+                self._hangover -= 1
             else:
-                vad_sr = self.sample_rate
+                if self._gate_open:
+                    # Gate closing: settle frames still waiting on a window, then
+                    # drop the recurrent state since the next span is not contiguous
+                    decisions.extend(self.silero.drain())
+                    self.silero.reset()
+                    self._gate_open = False
+                decisions.append((frame, False))
+                continue
             
-            # Run Silero VAD
-            inputs = {
-                "input": y[np.newaxis, :],
-                "state": self.silero_state,
-                "sr": np.array(vad_sr, dtype=np.int64)
-            }
-            out, self.silero_state = self.silero.run(None, inputs)
-            prob = float(out[0][0])
-            return prob > 0.5
-        
-        # Fallback: simple energy-based VAD
-        energy = np.sqrt(np.mean(frame.astype(np.float32) ** 2))
-        return energy > 1000
+            self._gate_open = True
+            self.frames_silero += 1
+            self.silero.push(frame)
+            decisions.extend(self.silero.flush())
+        return decisions
+    
+    async def _next_frames(self) -> List[np.ndarray]:
+        """Wait for a frame, then drain whatever else has backed up."""
+        frames = [self._resample(await self.frame_queue.get())]
+        while len(frames) < self.max_drain and self.frame_queue.qsize() > 0:
+            frames.append(self._resample(self.frame_queue.get_nowait()))
+        return frames
+    
+    def stats(self) -> dict:
+        if self.silero is None:
+            return {"mode": self.mode if self.mode == "staged" else "energy"}
+        return {
+            "mode": self.mode,
+            "silero_fraction": round(self.frames_silero / max(1, self.frames_total), 3),
+            "silero_calls": self.silero.calls
+        }
+    
+    async def _end_segment(self, segment: SegmentBuffer):
+        """Hand a finished utterance to ASR (or close the streamed one)."""
+        duration = self._streamed + segment.duration
+        audio = segment.take()
+        if duration < self.min_speech:
+            return
+        
+        if self.streaming:
+            if len(audio):
+                await self.speech_queue.put(audio)
+            await self.speech_queue.put(SPEECH_END)
+            self._streamed = 0.0
+        else:
+            await self.speech_queue.put(audio)
+        log.debug(f"vad: speech segment {duration:.2f}s")
+    
+    async def _stream(self, segment: SegmentBuffer):
+        """Forward voiced audio to ASR in small chunks while the utterance is open."""
+        # Hold the first chunk back until the utterance is long enough to keep
+        threshold = self.stream_chunk if self._streamed else max(self.stream_chunk, self.min_speech)
+        if segment.duration < threshold:
+            return
+        self._streamed += segment.duration
+        await self.speech_queue.put(segment.take())
+        
+        if self.max_segment and self._streamed >= self.max_segment:
+            await self.speech_queue.put(SPEECH_END)
+            self._streamed = 0.0
     
     async def run(self):
         """Main VAD processing loop."""
-        speech_buffer = []
+        segment = SegmentBuffer(self.sample_rate, int(self.max_segment * self.sample_rate))
         in_speech = False
         last_speech_time = 0.0
+        now = 0.0  # stream clock, so replayed audio gates like live audio
         
-        log.info("vad: started")
+        log.info(f"vad: started ({'streaming' if self.streaming else 'segment'} mode)")
         
         while True:
-            frame = await self.frame_queue.get()
-            frame = frame.reshape(-1)
-            
-            is_speech = self._is_speech(frame)
-            now = time.monotonic()
+            # Shared resampling stage: VAD and ASR both use these buffers
+            frames = await self._next_frames()
             
-            if is_speech:
-                # Resample to 16kHz for ASR if needed
-                if self.sample_rate == 48000:
-                    resampled = frame[::3].astype(np.int16)
-                elif self.sample_rate == 44100:
-                    resampled = frame[::3].astype(np.int16)
-                else:
-                    resampled = frame
+            for frame, is_speech in self._classify(frames):
+                now += self.frame_sec
                 
-                speech_buffer.append(resampled)
-                in_speech = True
-                last_speech_time = now
-                
-            else:
-                if in_speech:
-                    silence_duration = now - last_speech_time
+                if is_speech:
+                    segment.append(frame)
+                    in_speech = True
+                    last_speech_time = now
                     
-                    if silence_duration < self.max_silence:
-                        # Keep buffering during short pauses
-                        if self.sample_rate == 48000:
-                            resampled = frame[::3].astype(np.int16)
-                        elif self.sample_rate == 44100:
-                            resampled = frame[::3].astype(np.int16)
-                        else:
-                            resampled = frame
-                        speech_buffer.append(resampled)
-                    else:
-                        # End of speech segment
-                        in_speech = False
-                        duration = len(speech_buffer) * self.frame_sec
-                        
-                        if duration >= self.min_speech and speech_buffer:
-                            audio = np.concatenate(speech_buffer)
-                            await self.speech_queue.put(audio)
-                            log.debug(f"vad: speech segment {duration:.2f}s")
+                else:
+                    if in_speech:
+                        silence_duration = now - last_speech_time
                         
-                        speech_buffer = []
+                        if silence_duration < self.max_silence:
+                            # Keep buffering during short pauses
+                            segment.append(frame)
+                        else:
+                            # End of speech segment
+                            in_speech = False
+                            await self._end_segment(segment)
+                
+                if self.streaming:
+                    if in_speech:
+                        await self._stream(segment)
+                elif segment.full():
+                    # Bound ASR latency and memory on long or stuck-open speech
+                    audio = segment.split()
+                    await self.speech_queue.put(audio)
+                    log.info(f"vad: split long segment at {len(audio) / self.sample_rate:.2f}s")
@@ -1,4 +1,5 @@
 import httpx, logging, os
+from core2.http_pool import shared_pool
 log = logging.getLogger("ticktick")
 
 class TickTick:
@@ -7,32 +8,35 @@ class TickTick:
         self.client_id = client_id; self.client_secret = client_secret
         self.access = access; self.refresh = refresh
 
+    def _client(self) -> httpx.AsyncClient:
+        # keep-alive pool: one TLS handshake per connection instead of per call
+        return shared_pool().client(self.base)
+
     async def _refresh(self):
         if not (self.client_id and self.client_secret and self.refresh):
             raise RuntimeError("ticktick: missing refresh credentials")
-        async with httpx.AsyncClient(timeout=8.0) as cx:
-            r = await cx.post(f"{self.base}/oauth/token", data={
-                "grant_type":"refresh_token",
-                "refresh_token": self.refresh,
-                "client_id": self.client_id,
-                "client_secret": self.client_secret
-            })
-            r.raise_for_status()
-            j = r.json()
-            self.access = j["access_token"]; self.refresh = j.get("refresh_token", self.refresh)
-            log.info("ticktick: token refreshed")
+        r = await self._client().post(f"{self.base}/oauth/token", data={
+            "grant_type":"refresh_token",
+            "refresh_token": self.refresh,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret
+        }, timeout=8.0)
+        r.raise_for_status()
+        j = r.json()
+        self.access = j["access_token"]; self.refresh = j.get("refresh_token", self.refresh)
+        log.info("ticktick: token refreshed")
 
     async def create_task(self, title, project_id=None):
         if not self.access:
             raise RuntimeError("ticktick: missing access token")
         payload = {"title": title}
         if project_id: payload["projectId"] = project_id
-        async with httpx.AsyncClient(timeout=8.0) as cx:
+        cx = self._client()
+        r = await cx.post(f"{self.base}/open/v1/task", json=payload,
+                          headers={"Authorization": f"Bearer {self.access}"}, timeout=8.0)
+        if r.status_code == 401:
+            await self._refresh()
             r = await cx.post(f"{self.base}/open/v1/task", json=payload,
-                              headers={"Authorization": f"Bearer {self.access}"})
-            if r.status_code == 401:
-                await self._refresh()
-                r = await cx.post(f"{self.base}/open/v1/task", json=payload,
-                                  headers={"Authorization": f"Bearer {self.access}"})
-            r.raise_for_status()
-            return r.json()
\ No newline at end of file
+                              headers={"Authorization": f"Bearer {self.access}"}, timeout=8.0)
+        r.raise_for_status()
+        return r.json()
@@ -0,0 +1,27 @@
+"""Shared fixtures; also makes the repo root importable when pytest runs from anywhere."""
+import http.server
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def serve():
+    """Run a handler class on a local keep-alive HTTP/1.1 server; returns its base URL."""
+    servers = []
+
+    def start(handler: type) -> str:
+        handler.protocol_version = "HTTP/1.1"
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
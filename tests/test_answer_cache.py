@@ -0,0 +1,108 @@
+"""AnswerCache: similarity lookup, TTL, persistence and in-flight sharing."""
+import asyncio
+import time
+
+import numpy as np
+
+from core2.answer_cache import AnswerCache
+
+
+def unit(*values) -> np.ndarray:
+    v = np.asarray(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_lookup_counts_each_question_once(tmp_path):
+    cache = AnswerCache(str(tmp_path / "a.jsonl"), threshold=0.9)
+
+    async def main():
+        vector = unit(1, 0, 0)
+        assert cache.lookup(vector) is None
+
+        async def compute():
+            return "Paris."
+
+        assert await cache.answer(vector, "capital of france", compute) == "Paris."
+        assert cache.lookup(unit(1, 0.05, 0)) == "Paris."   # near-identical question
+        assert cache.lookup(unit(0, 1, 0)) is None           # different question
+
+    asyncio.run(main())
+    stats = cache.stats()
+    assert stats["answer_hits"] == 1
+    assert stats["answer_misses"] == 2
+
+
+def test_expired_and_shrug_answers_are_not_served(tmp_path):
+    cache = AnswerCache(str(tmp_path / "a.jsonl"), ttl_sec=60)
+
+    async def main():
+        async def shrug():
+            return "Not sure."
+
+        await cache.answer(unit(0, 0, 1), "q", shrug)
+        cache.put(unit(1, 0, 0), "old", "stale")
+
+    asyncio.run(main())
+    assert cache.lookup(unit(0, 0, 1)) is None
+    key = next(iter(cache.entries))
+    vector, question, answer, _ = cache.entries[key]
+    cache.entries[key] = (vector, question, answer, time.time() - 120)
+    assert cache.lookup(unit(1, 0, 0)) is None
+
+
+def test_answers_survive_a_restart_and_the_file_is_compacted(tmp_path):
+    path = str(tmp_path / "a.jsonl")
+    cache = AnswerCache(path, max_entries=3)
+
+    async def main():
+        for i in range(10):
+            cache.put(unit(*np.eye(10)[i]), f"q{i}", f"a{i}")
+        await asyncio.sleep(0.1)  # let the writer thread finish
+
+    asyncio.run(main())
+    cache.writer.shutdown(wait=True)
+    with open(path) as f:
+        assert sum(1 for _ in f) < 6
+
+    reloaded = AnswerCache(path, max_entries=3)
+    assert reloaded.lookup(unit(*np.eye(10)[9])) == "a9"
+    assert reloaded.lookup(unit(*np.eye(10)[0])) is None  # evicted
+
+
+def test_identical_questions_in_flight_share_one_request(tmp_path):
+    cache = AnswerCache(str(tmp_path / "a.jsonl"))
+    calls = []
+
+    async def main():
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "42."
+
+        vector = unit(1, 1, 0)
+        return await asyncio.gather(*(cache.answer(vector, "q", compute) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["42."] * 3
+    assert len(calls) == 1
+    assert cache.stats()["answer_joined"] == 2
+
+
+def test_waiter_takes_over_when_the_owner_is_cancelled(tmp_path):
+    cache = AnswerCache(str(tmp_path / "a.jsonl"))
+
+    async def main():
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "Yes."
+
+        vector = unit(0, 1, 1)
+        owner = asyncio.create_task(cache.answer(vector, "q", compute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.answer(vector, "q", compute))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await waiter, owner.cancelled()
+
+    answer, owner_cancelled = asyncio.run(main())
+    assert answer == "Yes."
+    assert owner_cancelled
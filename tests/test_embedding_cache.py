@@ -0,0 +1,47 @@
+"""EmbeddingCache: normalized keys, LRU eviction and batched misses."""
+import numpy as np
+
+from core2.embedding_cache import EmbeddingCache, normalize_text
+
+
+def fake_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.stack([np.full(3, len(t), dtype=np.float32) for t in texts])
+    return encode
+
+
+def test_normalize_text():
+    assert normalize_text("  Okay,  THANKS!! ") == "okay, thanks"
+    assert normalize_text("what's up?") == "what's up"
+
+
+def test_encode_runs_the_model_once_per_distinct_miss():
+    cache = EmbeddingCache()
+    calls = []
+    vectors = cache.encode(["Okay.", "okay", "thank you", "OKAY!"], fake_encoder(calls))
+    assert calls == [["Okay.", "thank you"]]
+    assert vectors.shape == (4, 3)
+    assert (vectors[0] == vectors[1]).all() and (vectors[0] == vectors[3]).all()
+
+    # Everything is cached now
+    cache.encode(["okay", "Thank you"], fake_encoder(calls))
+    assert len(calls) == 1
+    assert cache.stats()["cache_size"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", np.zeros(3))
+    cache.put("b", np.zeros(3))
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", np.zeros(3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["cache_hits"] == 3 and cache.stats()["cache_misses"] == 1
+
+
+def test_zero_size_disables_the_cache():
+    cache = EmbeddingCache(max_entries=0)
+    cache.put("a", np.zeros(3))
+    assert cache.get("a") is None
@@ -0,0 +1,92 @@
+"""EmissionScheduler: events are released by transcript, silence or timeout."""
+import asyncio
+
+from core2.scheduler import EmissionScheduler
+
+
+async def collect(scheduler: EmissionScheduler, body, settle: float):
+    runner = asyncio.create_task(scheduler.run())
+    await body()
+    await asyncio.sleep(settle)
+    runner.cancel()
+
+
+def make(post_sec: float, silence_sec: float):
+    emitted = []
+
+    async def emit(event):
+        emitted.append(event["n"])
+
+    return EmissionScheduler(post_sec, silence_sec, emit, tick_sec=0.01, slots=16), emitted
+
+
+def test_no_post_window_releases_at_once():
+    async def main():
+        s, emitted = make(0, 0)
+
+        async def body():
+            s.schedule({"n": 1}, trigger_ts=100.0)
+
+        await collect(s, body, 0.03)
+        return emitted, s.closed_by
+
+    emitted, closed = asyncio.run(main())
+    assert emitted == [1]
+    assert closed["transcript"] == 1
+
+
+def test_transcript_past_the_window_releases_in_order():
+    async def main():
+        s, emitted = make(5.0, 0)
+
+        async def body():
+            s.schedule({"n": 1}, trigger_ts=100.0)
+            s.schedule({"n": 2}, trigger_ts=102.0)
+            s.heard(104.0)
+            await asyncio.sleep(0.03)
+            assert emitted == []
+            s.heard(105.5)  # closes only the first window
+            await asyncio.sleep(0.03)
+            assert emitted == [1]
+            s.heard(107.0)
+
+        await collect(s, body, 0.03)
+        return emitted, s.stats()
+
+    emitted, stats = asyncio.run(main())
+    assert emitted == [1, 2]
+    assert stats["closed_transcript"] == 2 and stats["held"] == 0
+
+
+def test_silence_releases_before_the_hard_timeout():
+    async def main():
+        s, emitted = make(5.0, 0.05)
+
+        async def body():
+            s.schedule({"n": 1}, trigger_ts=100.0)
+
+        await collect(s, body, 0.2)
+        return emitted, s.closed_by
+
+    emitted, closed = asyncio.run(main())
+    assert emitted == [1]
+    assert closed["silence"] == 1
+
+
+def test_ongoing_speech_holds_until_the_hard_timeout():
+    async def main():
+        s, emitted = make(0.3, 0.1)
+
+        async def body():
+            s.schedule({"n": 1}, trigger_ts=100.0)
+            for _ in range(5):  # keep talking, but with old timestamps
+                await asyncio.sleep(0.04)
+                assert emitted == []
+                s.heard(100.01)
+
+        await collect(s, body, 0.2)
+        return emitted, s.closed_by
+
+    emitted, closed = asyncio.run(main())
+    assert emitted == [1]
+    assert closed["timeout"] == 1
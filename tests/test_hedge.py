@@ -0,0 +1,98 @@
+"""Hedger and LatencyHistogram: races, preference, cancellation and censoring."""
+import asyncio
+
+from core2.hedge import Hedger, LatencyHistogram
+
+
+async def after(sec: float, answer: str = None, error: bool = False):
+    await asyncio.sleep(sec)
+    if error:
+        raise RuntimeError("endpoint down")
+    return answer
+
+
+def test_histogram_quantiles_without_censoring():
+    h = LatencyHistogram()
+    for ms in range(100, 1100, 100):
+        h.record(ms)
+    assert 450 <= h.quantile(0.5) <= 560
+    assert 850 <= h.quantile(0.9) <= 1000
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_censored_samples_pull_the_quantile_up():
+    h = LatencyHistogram()
+    for _ in range(10):
+        h.record(100)
+    for _ in range(20):
+        h.record(300, censored=True)
+    # Two thirds of requests took at least 300 ms, so the median is no lower
+    assert h.quantile(0.5) >= 300
+
+
+def test_first_acceptable_answer_wins_and_the_loser_is_cancelled():
+    async def main():
+        hedger = Hedger(["local", "remote"], delay_ms=0)
+        result = await hedger.run({"local": lambda: after(0.2, "L"), "remote": lambda: after(0.02, "R")})
+        await asyncio.sleep(0.01)
+        return result, hedger
+
+    (answer, winner), hedger = asyncio.run(main())
+    assert (answer, winner) == ("R", "remote")
+    assert hedger.cancelled == 1
+    # The cancelled local request is kept as a censored sample
+    assert len(hedger.histograms["local"]) == 1
+
+
+def test_second_request_waits_for_the_hedge_delay():
+    started = []
+
+    async def main():
+        def call(name, sec):
+            async def go():
+                started.append(name)
+                return await after(sec, name)
+            return go
+
+        hedger = Hedger(["local", "remote"], delay_ms=100)
+        return await hedger.run({"local": call("local", 0.03), "remote": call("remote", 0.01)})
+
+    assert asyncio.run(main()) == ("local", "local")
+    assert started == ["local"]
+
+
+def test_shrug_or_failure_launches_the_next_endpoint_at_once():
+    async def main():
+        hedger = Hedger(["local", "remote"], delay_ms=10000)
+        shrug = await hedger.run({"local": lambda: after(0.01, "Not sure."),
+                                  "remote": lambda: after(0.01, "R")})
+        failed = await hedger.run({"local": lambda: after(0.01, error=True),
+                                   "remote": lambda: after(0.01, "R")})
+        only_shrugs = await hedger.run({"local": lambda: after(0.01, "Not sure."),
+                                        "remote": lambda: after(0.01, "not sure either")})
+        return shrug, failed, only_shrugs
+
+    shrug, failed, only_shrugs = asyncio.run(main())
+    assert shrug == ("R", "remote")
+    assert failed == ("R", "remote")
+    assert only_shrugs[0].lower().startswith("not sure")
+
+
+def test_preferred_endpoint_is_awaited_until_the_deadline():
+    async def main():
+        hedger = Hedger(["remote", "local"], prefer="remote", deadline_sec=0.1, delay_ms=0)
+        in_time = await hedger.run({"remote": lambda: after(0.05, "R"), "local": lambda: after(0.01, "L")})
+        too_late = await hedger.run({"remote": lambda: after(0.5, "R"), "local": lambda: after(0.01, "L")})
+        return in_time, too_late
+
+    in_time, too_late = asyncio.run(main())
+    assert in_time == ("R", "remote")
+    assert too_late == ("L", "local")
+
+
+def test_auto_delay_follows_the_first_endpoint():
+    hedger = Hedger(["local", "remote"], min_samples=3)
+    assert hedger.delay_sec() == 0.0
+    for ms in (200, 210, 220):
+        hedger.histograms["local"].record(ms)
+    assert 0.2 <= hedger.delay_sec() <= 0.25
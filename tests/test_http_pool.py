@@ -0,0 +1,56 @@
+"""HttpPool: one keep-alive client per origin, connections reused across requests."""
+import asyncio
+import http.server
+
+from core2.http_pool import HttpPool
+
+
+class Echo(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_requests_to_one_origin_share_a_connection(serve):
+    base = serve(Echo)
+    pool = HttpPool()
+
+    async def main():
+        try:
+            for i in range(5):
+                response = await pool.client(base + "/v1").get(f"{base}/n/{i}")
+                assert response.text == f"/n/{i}"
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(main())
+    assert stats["endpoints"] == 1
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert stats["reused"] == 4
+
+
+def test_each_origin_gets_its_own_client(serve):
+    first, second = serve(Echo), serve(Echo)
+    pool = HttpPool()
+
+    async def main():
+        try:
+            assert pool.client(first + "/a") is pool.client(first + "/b")
+            assert pool.client(first) is not pool.client(second)
+            await pool.client(first).get(first)
+            await pool.client(second).get(second)
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(main())
+    assert stats["endpoints"] == 2 and stats["connections"] == 2
+    assert not pool.clients  # closed on shutdown
@@ -0,0 +1,109 @@
+"""LLMScheduler: priority order, deadlines, backlog modes and queue bounds."""
+import asyncio
+
+from core2.llm_scheduler import LLMScheduler
+
+
+def run_jobs(kinds, settle=0.4, **options):
+    """Submit events of the given kinds while one worker is busy; return the run order."""
+    order = []
+
+    async def main():
+        async def handle(event, cheap):
+            await asyncio.sleep(0.01)
+            order.append((event["type"], event["n"], cheap))
+
+        scheduler = LLMScheduler(handle, **options)
+        runner = asyncio.create_task(scheduler.run())
+        for n, kind in enumerate(kinds):
+            await scheduler.submit({"type": kind, "n": n})
+        await asyncio.sleep(settle)
+        runner.cancel()
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    return order, scheduler
+
+
+def test_questions_then_todos_then_memories():
+    order, scheduler = run_jobs(["memory", "todo", "question", "memory", "question"],
+                                concurrency=1, backlog_depth=0)
+    assert [(kind, n) for kind, n, _ in order] == [
+        ("question", 2), ("question", 4), ("todo", 1), ("memory", 0), ("memory", 3)]
+    stats = scheduler.stats()
+    assert stats["question_wait_max_ms"] <= stats["memory_wait_max_ms"]
+
+
+def test_expired_jobs_are_dropped():
+    async def main():
+        done = []
+
+        async def handle(event, cheap):
+            await asyncio.sleep(0.05)
+            done.append(event["n"])
+
+        scheduler = LLMScheduler(handle, concurrency=1, deadlines={"question": 0.02})
+        runner = asyncio.create_task(scheduler.run())
+        await scheduler.submit({"type": "todo", "n": 0})
+        await asyncio.sleep(0.01)  # the todo starts running
+        await scheduler.submit({"type": "question", "n": 1})
+        await asyncio.sleep(0.2)
+        runner.cancel()
+        return done, scheduler.expired
+
+    done, expired = asyncio.run(main())
+    assert done == [0]
+    assert expired == 1
+
+
+def test_backlog_makes_memories_cheap():
+    order, scheduler = run_jobs(["memory"] * 4, concurrency=1, backlog_depth=3, backlog_memory="cheap")
+    # Depth is counted before the pop: 4 and 3 queued are a backlog, 2 and 1 are not
+    assert [cheap for _, _, cheap in order] == [True, True, False, False]
+    assert scheduler.degraded == 2
+
+
+def test_backlog_defers_memories_until_idle():
+    order, scheduler = run_jobs(["memory", "memory", "memory", "todo", "question"],
+                                concurrency=1, backlog_depth=3, backlog_memory="defer")
+    assert [kind for kind, _, _ in order][:2] == ["question", "todo"]
+    # The memory popped with three still queued is set aside and runs last
+    assert sorted(n for kind, n, _ in order if kind == "memory") == [0, 1, 2]
+    assert order[-1] == ("memory", 0, False)
+    assert scheduler.deferrals >= 1
+    assert not any(cheap for _, _, cheap in order)
+
+
+def test_deferred_memories_are_capped():
+    order, scheduler = run_jobs(["memory"] * 6, concurrency=1, backlog_depth=2,
+                                backlog_memory="defer", max_deferred=2)
+    assert len(order) < 6
+    assert scheduler.expired >= 1
+
+
+def test_full_queue_sheds_lower_priority_for_a_question():
+    order, scheduler = run_jobs(["memory"] * 4 + ["question"], concurrency=1, backlog_depth=0,
+                                max_queued=4)
+    assert order[0][0] == "question"
+    assert len(order) == 4
+    assert scheduler.shed == 1
+
+
+def test_full_queue_blocks_equal_priority():
+    async def main():
+        async def handle(event, cheap):
+            await asyncio.sleep(0.05)
+
+        scheduler = LLMScheduler(handle, concurrency=1, backlog_depth=0, max_queued=2)
+        for n in range(2):
+            await scheduler.submit({"type": "todo", "n": n})
+        blocked = asyncio.create_task(scheduler.submit({"type": "todo", "n": 2}))
+        await asyncio.sleep(0.02)
+        was_blocked = not blocked.done()
+        runner = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.02)
+        unblocked = blocked.done()
+        runner.cancel()
+        return was_blocked, unblocked
+
+    assert asyncio.run(main()) == (True, True)
@@ -0,0 +1,84 @@
+"""Streamed answers: the first sentence is passed on before the completion ends."""
+import asyncio
+import http.server
+import json
+import threading
+
+from core2.config import Config
+from core2.http_pool import HttpPool
+from core2.llm import LLMClient
+
+
+def sse_handler(deltas, hold_at=None, release=None, released=None):
+    """Chat completions endpoint streaming `deltas`; waits on `release` before index `hold_at`."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            events = [{"choices": [{"delta": {"content": d}}]} for d in deltas]
+            events.append({"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 9}})
+            for i, event in enumerate(events):
+                if i == hold_at:
+                    released.append(release.wait(5))
+                self.send_chunk(f"data: {json.dumps(event)}\n\n")
+            self.send_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def send_chunk(self, text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def ask(base, on_sentence=None):
+    """(answer, early sentences, client) for one streamed question."""
+    client = LLMClient(Config(llm_base_url=base, llm_stream=True), pool=HttpPool())
+    sentences = []
+
+    def early(sentence):
+        sentences.append(sentence)
+        if on_sentence:
+            on_sentence(sentence)
+
+    async def main():
+        try:
+            return await client.answer_question("q", early)
+        finally:
+            await client.pool.close()
+
+    return asyncio.run(main()), sentences, client
+
+
+def test_first_sentence_arrives_while_the_rest_is_pending(serve):
+    release, released = threading.Event(), []
+    deltas = ["Canberra is", " the capital of Australia.", " It was founded", " in 1913."]
+    base = serve(sse_handler(deltas, hold_at=3, release=release, released=released))
+
+    # The server only sends the tail once the first sentence is out
+    answer, sentences, client = ask(base, lambda sentence: release.set())
+    assert released == [True]
+    assert sentences == ["Canberra is the capital of Australia."]
+    assert answer == "Canberra is the capital of Australia. It was founded in 1913."
+    assert client.stats()["requests"] == 1
+
+
+def test_sentence_end_needs_whitespace_and_a_minimum_length(serve):
+    base = serve(sse_handler(["Yes. Pi is roughly 3.", "14 in value.", " More follows."]))
+    answer, sentences, _ = ask(base)
+    assert sentences == ["Yes. Pi is roughly 3.14 in value."]
+    assert answer == "Yes. Pi is roughly 3.14 in value. More follows."
+
+
+def test_single_sentence_is_not_shown_early(serve):
+    base = serve(sse_handler(["Not sure."]))
+    answer, sentences, _ = ask(base)
+    assert sentences == [] and answer == "Not sure."
@@ -0,0 +1,66 @@
+"""Prototype files: seeding, validation and change detection for hot reload."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from core2.prototypes import PrototypeFile, build_prototype_set, load_prototypes
+
+DEFAULTS = {"todo": ["remind me to call mom"], "question": ["what time is it", "how far is it"]}
+
+
+def rewrite(path, data):
+    """Write and bump the mtime so the change is seen even within one timestamp tick."""
+    stamp = os.stat(path).st_mtime_ns
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.utime(path, ns=(stamp + 10**9, stamp + 10**9))
+
+
+def test_seeds_the_file_with_defaults(tmp_path):
+    path = tmp_path / "sub" / "prototypes.json"
+    protos = PrototypeFile(str(path), DEFAULTS)
+    assert json.loads(path.read_text()) == DEFAULTS
+    assert protos.changed()
+    assert protos.load() == DEFAULTS
+    assert not protos.changed()
+
+
+def test_edits_are_picked_up_once(tmp_path):
+    path = tmp_path / "prototypes.json"
+    protos = PrototypeFile(str(path), DEFAULTS)
+    protos.load()
+
+    rewrite(path, {"memory": "today was a good day", "todo": ["buy milk", " "]})
+    assert protos.changed()
+    assert protos.load() == {"memory": ["today was a good day"], "todo": ["buy milk"]}
+    assert not protos.changed()
+
+
+def test_a_broken_edit_raises_once(tmp_path):
+    path = tmp_path / "prototypes.json"
+    protos = PrototypeFile(str(path), DEFAULTS)
+    protos.load()
+
+    rewrite(path, {"todo": []})
+    assert protos.changed()
+    with pytest.raises(ValueError):
+        protos.load()
+    assert not protos.changed()  # not retried on every poll
+
+
+def test_load_rejects_a_list(tmp_path):
+    path = tmp_path / "prototypes.json"
+    path.write_text(json.dumps(["a", "b"]))
+    with pytest.raises(ValueError):
+        load_prototypes(str(path))
+
+
+def test_build_prototype_set_groups_examples_by_label():
+    raw = np.array([[2, 0], [0, 1], [0, 3]], dtype=np.float32)
+    protos = build_prototype_set(DEFAULTS, raw)
+    assert protos.labels == ["todo", "question"]
+    assert protos.starts.tolist() == [0, 1]
+    np.testing.assert_allclose(protos.means, [[1, 0], [0, 1]], atol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(protos.examples, axis=1), 1.0, atol=1e-6)
@@ -0,0 +1,48 @@
+"""Resampler: output length, streaming continuity and tone preservation."""
+import numpy as np
+
+from core2.resample import Resampler, resample
+
+
+def tone(freq: float, rate: int, seconds: float) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * 32767 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def test_passthrough_only_scales():
+    x = np.array([0, 16384, -32768], dtype=np.int16)
+    y = Resampler(16000, 16000).process(x)
+    assert y.dtype == np.float32
+    np.testing.assert_allclose(y, [0.0, 0.5, -1.0])
+
+
+def test_output_length_tracks_the_rate_ratio():
+    r = Resampler(48000, 16000)
+    total = sum(len(r.process(np.zeros(960, dtype=np.int16))) for _ in range(50))
+    assert total == 50 * 320
+
+    r = Resampler(44100, 16000)
+    total = sum(len(r.process(np.zeros(882, dtype=np.int16))) for _ in range(100))
+    assert abs(total - 100 * 882 * 16000 / 44100) <= 1
+
+
+def test_frame_by_frame_matches_one_block():
+    x = tone(440, 44100, 0.5)
+    whole = Resampler(44100).process(x)
+    r = Resampler(44100)
+    parts = np.concatenate([r.process(x[i:i + 441]) for i in range(0, len(x), 441)])
+    np.testing.assert_allclose(parts, whole, atol=1e-5)
+
+
+def test_tone_frequency_and_level_survive():
+    y = resample(tone(1000, 48000, 1.0), 48000, 16000).astype(np.float32)
+    spectrum = np.abs(np.fft.rfft(y[1000:-1000] * np.hanning(len(y) - 2000)))
+    peak_hz = np.argmax(spectrum) * 16000 / (len(y) - 2000)
+    assert abs(peak_hz - 1000) < 5
+    rms = np.sqrt(np.mean(y[1000:-1000] ** 2))
+    assert abs(rms - 0.5 * 32767 / np.sqrt(2)) / rms < 0.05
+
+
+def test_content_above_new_nyquist_is_filtered():
+    y = resample(tone(12000, 48000, 0.5), 48000, 16000).astype(np.float32)
+    assert np.sqrt(np.mean(y[500:-500] ** 2)) < 0.02 * 32767
@@ -0,0 +1,101 @@
+"""FrameRing: ordering, wraparound, overruns and backpressure."""
+import asyncio
+
+import numpy as np
+
+from core2.ring import FrameRing
+
+
+def frame(value: int, n: int = 160) -> np.ndarray:
+    return np.full(n, value, dtype=np.int16)
+
+
+def test_frames_come_back_in_order_across_wraparound():
+    async def main():
+        ring = FrameRing(capacity=4, wake_frames=1)
+        ring.configure(160, 8000)
+        seen = []
+        for i in range(10):
+            assert ring.write(frame(i))
+            seen.append(int((await ring.get())[0]))
+        return seen
+
+    assert asyncio.run(main()) == list(range(10))
+
+
+def test_short_block_is_zero_padded():
+    async def main():
+        ring = FrameRing(capacity=4, wake_frames=1)
+        ring.configure(160, 8000)
+        ring.write(frame(7, 100))
+        return (await ring.get()).copy()
+
+    got = asyncio.run(main())
+    assert len(got) == 160
+    assert (got[:100] == 7).all() and (got[100:] == 0).all()
+
+
+def test_write_counts_overruns_when_full():
+    async def main():
+        ring = FrameRing(capacity=3, wake_frames=1)
+        ring.configure(160, 8000)
+        results = [ring.write(frame(i)) for i in range(5)]
+        return results, ring.overruns, ring.qsize()
+
+    results, overruns, size = asyncio.run(main())
+    assert results == [True, True, True, False, False]
+    assert overruns == 2
+    assert size == 3
+
+
+def test_returned_view_holds_its_slot_until_next_get():
+    async def main():
+        ring = FrameRing(capacity=2, wake_frames=1)
+        ring.configure(160, 8000)
+        ring.write(frame(1))
+        ring.write(frame(2))
+        first = await ring.get()
+        # The slot of `first` is still held, so the ring is full
+        accepted = ring.write(frame(3))
+        value = int(first[0])
+        second = ring.get_nowait()
+        return accepted, value, int(second[0]), ring.write(frame(3))
+
+    accepted, value, second, after = asyncio.run(main())
+    assert not accepted
+    assert value == 1 and second == 2
+    assert after
+
+
+def test_get_nowait_raises_when_empty():
+    async def main():
+        ring = FrameRing(capacity=2)
+        ring.configure(160, 8000)
+        try:
+            ring.get_nowait()
+        except asyncio.QueueEmpty:
+            return True
+        return False
+
+    assert asyncio.run(main())
+
+
+def test_put_waits_for_space_instead_of_dropping():
+    async def main():
+        ring = FrameRing(capacity=2, wake_frames=1)
+        ring.configure(160, 8000)
+
+        async def produce():
+            for i in range(8):
+                await ring.put(frame(i))
+
+        producer = asyncio.create_task(produce())
+        seen = []
+        for _ in range(8):
+            seen.append(int((await ring.get())[0]))
+        await producer
+        return seen, ring.overruns
+
+    seen, overruns = asyncio.run(main())
+    assert seen == list(range(8))
+    assert overruns == 0
@@ -0,0 +1,72 @@
+"""RollingBuffer: incremental window joins and token-budgeted windows."""
+import random
+
+from core2.rolling import RollingBuffer
+
+
+def live(buf: RollingBuffer):
+    """(ts, text) of the entries not yet evicted."""
+    return list(zip(buf.ts, buf.texts))[len(buf.ts) - len(buf):]
+
+
+def words(texts):
+    return [len(t.split()) for t in texts]
+
+
+def test_join_matches_plain_join_after_random_add_and_trim():
+    rng = random.Random(7)
+    # Small caps so eviction and compaction both happen along the way
+    buf = RollingBuffer(pre_sec=5, post_sec=3, max_entries=40, max_bytes=2048)
+    now = 0.0
+    for step in range(2000):
+        now += rng.uniform(0.0, 0.6)
+        late = rng.random() < 0.1
+        text = " ".join(rng.choice(["a", "bb", "ccc", "déjà", "x y"]) for _ in range(rng.randint(1, 4)))
+        buf.add(f"{step}:{text}", now - rng.uniform(0.5, 3.0) if late else now)
+
+        center = now - rng.uniform(0.0, 4.0)
+        expected = " ".join(t for ts, t in live(buf) if center - 5 <= ts <= center + 3)
+        assert buf.get_window(center) == expected
+    assert buf.window_reuse > 0
+
+
+def test_budget_keeps_the_lines_nearest_the_trigger():
+    buf = RollingBuffer(pre_sec=10, post_sec=10)
+    for i in range(21):
+        buf.add(f"l{i}", float(i))
+    text, tokens, kept, total = buf.get_budgeted_window(10.0, 5, words)
+    assert text == "l8 l9 l10 l11 l12"
+    assert (tokens, kept, total) == (5, 5, 21)
+
+    # Nothing to cut: the whole window, same as get_window
+    assert buf.get_budgeted_window(10.0, 0, words)[0] == buf.get_window(10.0)
+
+
+def test_budgeted_windows_stay_within_budget_and_centred():
+    rng = random.Random(11)
+    buf = RollingBuffer(pre_sec=30, post_sec=10)
+    now = 0.0
+    for i in range(300):
+        now += rng.uniform(0.1, 2.0)
+        buf.add(" ".join([f"#{i}"] + ["w"] * rng.randint(0, 11)), now)
+
+    for _ in range(200):
+        center = rng.choice(buf.ts[-100:])
+        budget = rng.randint(1, 80)
+        text, tokens, kept, total = buf.get_budgeted_window(center, budget, words)
+        window = [(ts, t) for ts, t in live(buf) if center - 30 <= ts <= center + 10]
+        assert total == len(window)
+
+        # The trigger line always; beyond it, never over budget
+        assert tokens == len(text.split())
+        assert tokens <= budget or kept == 1
+
+        # Kept lines are a contiguous run around the trigger, nearer than any line left out
+        first = next(i for i, (ts, _) in enumerate(window) if ts >= center)
+        start = [t.split()[0] for _, t in window].index(text.split()[0])
+        assert start <= first < start + kept
+        assert text == " ".join(t for _, t in window[start:start + kept])
+        inside = [abs(ts - center) for ts, _ in window[start:start + kept]]
+        outside = [abs(ts - center) for ts, _ in window[:start] + window[start + kept:]]
+        if outside:
+            assert max(inside) <= min(outside)
@@ -0,0 +1,31 @@
+"""Default keyword rules: obvious intents decided, ambiguous ones left to the model."""
+import pytest
+
+from core2.rules import DEFAULT_RULES, RuleSet
+
+
+@pytest.fixture
+def rules():
+    return RuleSet(DEFAULT_RULES)
+
+
+@pytest.mark.parametrize("text", [
+    "what's up", "How's it going?", "what do you mean", "where are you", "how was your day"
+])
+def test_small_talk_is_not_a_question(rules, text):
+    assert rules.match(text).label == "ignore"
+
+
+@pytest.mark.parametrize("text", ["what do you think about it", "where did you park", "who are you"])
+def test_second_person_questions_go_to_the_model(rules, text):
+    assert rules.match(text) is None
+
+
+@pytest.mark.parametrize("text", ["what is the capital of Australia", "how far is the moon from the earth"])
+def test_wh_question(rules, text):
+    assert rules.match(text).rule == "wh_question"
+
+
+def test_note_needs_a_clause(rules):
+    assert rules.match("note that down") is None
+    assert rules.match("note that I parked on level three").label == "memory"
@@ -0,0 +1,56 @@
+"""SegmentBuffer: int16 conversion, growth, take and quiet-point split."""
+import numpy as np
+
+from core2.vad import SegmentBuffer
+
+
+def test_append_converts_and_grows():
+    buf = SegmentBuffer(16000, initial_sec=0.01)  # 160 samples to start
+    for _ in range(10):
+        buf.append(np.full(320, 0.5, dtype=np.float32))
+    assert buf.length == 3200
+    assert buf.duration == 0.2
+    audio = buf.take()
+    assert audio.dtype == np.int16 and len(audio) == 3200
+    assert (audio == 16384).all()
+    assert buf.length == 0
+
+
+def test_append_clips_out_of_range_samples():
+    buf = SegmentBuffer(16000)
+    buf.append(np.array([2.0, -2.0], dtype=np.float32))
+    assert buf.take().tolist() == [32767, -32768]
+
+
+def test_take_returns_a_copy():
+    buf = SegmentBuffer(16000)
+    buf.append(np.full(10, 0.25, dtype=np.float32))
+    audio = buf.take()
+    buf.append(np.zeros(10, dtype=np.float32))
+    assert (audio == 8192).all()
+
+
+def test_full_only_with_a_limit():
+    assert not SegmentBuffer(16000).full()
+    buf = SegmentBuffer(16000, max_samples=1000)
+    buf.append(np.zeros(999, dtype=np.float32))
+    assert not buf.full()
+    buf.append(np.zeros(1, dtype=np.float32))
+    assert buf.full()
+
+
+def test_split_cuts_in_the_quietest_block_and_keeps_the_tail():
+    rate = 16000
+    loud = np.full(rate, 0.5, dtype=np.float32)
+    loud[int(0.6 * rate):int(0.6 * rate) + 160] = 0.0  # one silent 10 ms block
+    buf = SegmentBuffer(rate)
+    buf.append(np.full(rate, 0.5, dtype=np.float32))
+    buf.append(loud)
+
+    head = buf.split()
+    cut = rate + int(0.6 * rate) + 80
+    assert len(head) == cut
+    assert buf.length == 2 * rate - cut
+    # Remainder starts where the cut was made and is still intact
+    tail = buf.take()
+    assert (tail[:80] == 0).all() and (tail[-10:] == 16384).all()
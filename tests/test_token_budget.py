@@ -0,0 +1,45 @@
+"""Context token budgets: untruncated token counts feeding the budgeted window."""
+import pytest
+
+tokenizers = pytest.importorskip("tokenizers")
+
+from core2.rolling import RollingBuffer
+from core2.tokenizer import FastTokenizer
+
+
+@pytest.fixture
+def tokenizer(tmp_path):
+    """FastTokenizer over a word-level tokenizer.json with special tokens, truncating at 4."""
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+    from tokenizers.processors import TemplateProcessing
+
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "the", "cat", "sat", "on", "a", "mat"]
+    tok = tokenizers.Tokenizer(WordLevel({w: i for i, w in enumerate(words)}, unk_token="[UNK]"))
+    tok.pre_tokenizer = Whitespace()
+    tok.post_processor = TemplateProcessing(single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)])
+    tok.save(str(tmp_path / "tokenizer.json"))
+    return FastTokenizer(str(tmp_path), max_length=4)
+
+
+def test_count_ignores_special_tokens_and_truncation(tokenizer):
+    assert tokenizer.backend == "tokenizers"
+    assert tokenizer.count(["the cat sat on a mat", "cat", ""]) == [6, 1, 0]
+
+    # The batch tokenizer still truncates and pads for the model
+    batch = tokenizer(["the cat sat on a mat", "cat"])
+    assert batch["input_ids"].shape == (2, 4)
+    assert batch["attention_mask"].tolist()[1] == [1, 1, 1, 0]
+
+
+def test_budgeted_window_counts_with_the_tokenizer(tokenizer):
+    buf = RollingBuffer(pre_sec=10, post_sec=10)
+    for i, text in enumerate(["the cat", "sat on a mat", "the cat sat", "a mat", "on the mat"]):
+        buf.add(text, float(i))
+
+    text, tokens, kept, total = buf.get_budgeted_window(2.0, 7, tokenizer.count)
+    assert (text, tokens, kept, total) == ("sat on a mat the cat sat", 7, 2, 5)
+
+    # A budget of 0 keeps the whole window
+    text, tokens, kept, _ = buf.get_budgeted_window(2.0, 0, tokenizer.count)
+    assert text == buf.get_window(2.0) and tokens == 14 and kept == 5
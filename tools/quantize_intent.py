@@ -0,0 +1,161 @@
+"""Build an INT8 intent model and compare it against FP32.
+
+    python tools/quantize_intent.py quantize [--model-dir DIR]
+    python tools/quantize_intent.py compare [--model-dir DIR] [--utterances FILE]
+
+`quantize` writes model.int8.onnx next to model.onnx using ONNX Runtime
+dynamic quantization (needs the `onnx` package). `compare` runs a labelled
+utterance set through both variants and reports label agreement, accuracy,
+margins against the intent threshold, per-utterance latency and the memory
+taken by each session. Each variant is measured in its own interpreter so
+one model's allocations do not count against the other. Select the variant
+at runtime with INTENT_MODEL_VARIANT.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core2.config import Config  # noqa: E402
+from core2.intent import MODEL_VARIANTS, IntentClassifier  # noqa: E402
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def quantize(model_dir: str, weight_type: str):
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        sys.exit(f"quantize: onnxruntime quantization needs the 'onnx' package ({e})")
+
+    src = os.path.join(model_dir, MODEL_VARIANTS["fp32"])
+    dst = os.path.join(model_dir, MODEL_VARIANTS["int8"])
+    quantize_dynamic(src, dst, weight_type=getattr(QuantType, weight_type))
+    print(f"quantize: {src} ({os.path.getsize(src) / 1e6:.1f} MB) -> "
+          f"{dst} ({os.path.getsize(dst) / 1e6:.1f} MB)")
+
+
+def load_utterances(path: str):
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, text = line.split("\t", 1)
+            rows.append((label.strip(), text.strip()))
+    return rows
+
+
+def run_variant(model_dir: str, variant: str, threshold: float, texts, repeats: int) -> dict:
+    before = rss_mb()
+    # No embedding or artifact cache, so every call measures the model
+    clf = IntentClassifier(model_dir, threshold, cache_size=0, variant=variant)
+    memory = rss_mb() - before
+
+    clf.classify_batch(texts[:4])  # warm up
+    latencies = []
+    results = []
+    for _ in range(repeats):
+        results = []
+        for text in texts:
+            start = time.perf_counter()
+            results.append(clf.classify(text))
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    return {
+        "labels": [r[0] for r in results],
+        "scores": [float(r[1]) for r in results],
+        "latency_ms": latencies,
+        "memory_mb": memory
+    }
+
+
+def measure(model_dir: str, variant: str, utterances: str, repeats: int) -> dict:
+    """Run one variant in a fresh interpreter and return its results."""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "measure", "--variant", variant,
+         "--model-dir", model_dir, "--utterances", utterances, "--repeats", str(repeats)],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        sys.exit(f"compare: {variant} run failed:\n{proc.stderr.strip()}")
+    r = json.loads(proc.stdout.strip().splitlines()[-1])
+    r["scores"] = np.array(r["scores"])
+    r["latency_ms"] = np.array(r["latency_ms"])
+    return r
+
+
+def compare(model_dir: str, utterances: str, repeats: int):
+    if not os.path.isfile(os.path.join(model_dir, MODEL_VARIANTS["int8"])):
+        sys.exit("compare: no model.int8.onnx yet, run the quantize command first")
+
+    threshold = Config().intent_threshold
+    rows = load_utterances(utterances)
+    gold = [label for label, _ in rows]
+    texts = [text for _, text in rows]
+    runs = {v: measure(model_dir, v, utterances, repeats) for v in ("fp32", "int8")}
+
+    print(f"{len(texts)} utterances, threshold {threshold}, {repeats} repeat(s)\n")
+    print(f"{'variant':<8}{'accuracy':>10}{'p50 ms':>9}{'p99 ms':>9}{'memory':>10}")
+    for variant, r in runs.items():
+        accuracy = np.mean([a == b for a, b in zip(r["labels"], gold)])
+        p50, p99 = np.percentile(r["latency_ms"], [50, 99])
+        print(f"{variant:<8}{accuracy:>10.2%}{p50:>9.2f}{p99:>9.2f}{r['memory_mb']:>8.1f}MB")
+
+    fp32, int8 = runs["fp32"], runs["int8"]
+    agree = [a == b for a, b in zip(fp32["labels"], int8["labels"])]
+    print(f"\nint8 agrees with fp32 on {sum(agree)}/{len(agree)} labels ({np.mean(agree):.2%})")
+
+    # Margin = best prototype score minus threshold; sign flips change ignore/act decisions
+    print(f"\n{'margin':<8}{'min':>8}{'p10':>8}{'p50':>8}{'p90':>8}")
+    for variant, r in runs.items():
+        margins = r["scores"] - threshold
+        q = np.percentile(margins, [10, 50, 90])
+        print(f"{variant:<8}{margins.min():>8.3f}{q[0]:>8.3f}{q[1]:>8.3f}{q[2]:>8.3f}")
+    delta = np.abs(int8["scores"] - fp32["scores"])
+    flips = int(np.sum((fp32["scores"] >= threshold) != (int8["scores"] >= threshold)))
+    print(f"score drift: mean {delta.mean():.4f}, max {delta.max():.4f}; "
+          f"{flips} utterance(s) cross the threshold")
+
+    for ok, text, a, b in zip(agree, texts, fp32["labels"], int8["labels"]):
+        if not ok:
+            print(f"  differs: '{text}' fp32={a} int8={b}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("command", choices=("quantize", "compare", "measure"))
+    parser.add_argument("--variant", default="fp32", choices=tuple(MODEL_VARIANTS))  # measure only
+    parser.add_argument("--model-dir", default=Config().intent_model_path)
+    parser.add_argument("--weight-type", default="QInt8", choices=("QInt8", "QUInt8"))
+    parser.add_argument("--utterances", default=os.path.join(ROOT, "tools", "intent_utterances.tsv"))
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "quantize":
+        quantize(args.model_dir, args.weight_type)
+    elif args.command == "measure":
+        # Internal: one variant per process, called by compare
+        texts = [text for _, text in load_utterances(args.utterances)]
+        result = run_variant(args.model_dir, args.variant, Config().intent_threshold, texts, args.repeats)
+        print(json.dumps(result))
+    else:
+        compare(args.model_dir, args.utterances, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
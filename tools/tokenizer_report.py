@@ -0,0 +1,61 @@
+"""Compare import time and memory of the intent tokenizer backends.
+
+Each backend is measured in a fresh interpreter so import caches do not mix:
+
+    python tools/tokenizer_report.py [models/all-MiniLM-L6-v2]
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+base = rss_mb()
+t0 = time.perf_counter()
+if {backend!r} == "tokenizers":
+    from tokenizers import Tokenizer
+    t1 = time.perf_counter()
+    from core2.tokenizer import FastTokenizer
+    tok = FastTokenizer({model_dir!r})
+else:
+    from transformers import AutoTokenizer
+    t1 = time.perf_counter()
+    tok = AutoTokenizer.from_pretrained({model_dir!r})
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "load_s": t2 - t1, "rss_mb": rss_mb() - base}}))
+"""
+
+
+def measure(backend: str, model_dir: str) -> dict:
+    code = _PROBE.format(root=ROOT, backend=backend, model_dir=model_dir)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "models", "all-MiniLM-L6-v2")
+    print(f"{'backend':<14}{'import':>10}{'load':>10}{'rss':>10}")
+    for backend in ("transformers", "tokenizers"):
+        r = measure(backend, model_dir)
+        if "error" in r:
+            print(f"{backend:<14}  unavailable: {r['error']}")
+            continue
+        print(f"{backend:<14}{r['import_s']:>9.2f}s{r['load_s']:>9.2f}s{r['rss_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()